@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+PDF 本地解析基准：对比 pdf_table_mode=always（每页 extract_tables）与 auto（按线框密度决定）的耗时。
+
+用法：
+    python bench_pdf_extract.py <pdf 文件或目录> [...]
+"""
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(os.path.dirname(__file__))
+
+from search_anylyze import _read_pdf_by_page
+
+
+def _collect(paths):
+    for arg in paths:
+        p = Path(arg)
+        if p.is_dir():
+            yield from sorted(p.rglob("*.pdf"))
+        elif p.suffix.lower() == ".pdf":
+            yield p
+
+
+def _run(path: Path, mode: str):
+    started = time.perf_counter()
+    data = json.loads(_read_pdf_by_page(path, table_mode=mode))
+    elapsed = time.perf_counter() - started
+    pages = data.get("pages") or []
+    tables = sum(len(p.get("tables") or []) for p in pages)
+    checked = sum(1 for p in pages if (p.get("meta") or {}).get("tables_checked"))
+    return elapsed, len(pages), tables, checked
+
+
+def main():
+    files = list(_collect(sys.argv[1:]))
+    if not files:
+        print(__doc__)
+        return
+
+    totals = {"always": 0.0, "auto": 0.0}
+    print(f"{'文件':<40} {'页数':>5} {'always(s)':>10} {'auto(s)':>9} {'加速':>6} {'表格 always/auto':>16} {'检测页':>6}")
+    for path in files:
+        t_always, pages, tables_always, _ = _run(path, "always")
+        t_auto, _, tables_auto, checked = _run(path, "auto")
+        totals["always"] += t_always
+        totals["auto"] += t_auto
+        speedup = t_always / t_auto if t_auto else 0.0
+        print(
+            f"{path.name[:40]:<40} {pages:>5} {t_always:>10.2f} {t_auto:>9.2f} {speedup:>5.1f}x "
+            f"{tables_always:>8}/{tables_auto:<7} {checked:>6}"
+        )
+
+    if totals["auto"]:
+        print(
+            f"\n合计：always {totals['always']:.2f}s，auto {totals['auto']:.2f}s，"
+            f"加速 {totals['always'] / totals['auto']:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+class LRUCache:
+    """线程安全、容量有界的内存 LRU，条目可带过期时间。"""
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max(1, int(max_size))
+        self._data: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any, expires_at: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SqliteStore:
+    """
+    基于 SQLite 的持久化 KV：值以 JSON 存储，按 namespace 隔离，支持过期时间。
+    同一路径的多个实例共用一个连接（进程内加锁串行访问）。
+    """
+
+    _CONNECTIONS: Dict[str, Tuple[sqlite3.Connection, threading.Lock]] = {}
+    _CONNECTIONS_LOCK = threading.Lock()
+
+    def __init__(self, path: str, namespace: str):
+        self.path = str(path)
+        self.namespace = namespace
+        self._conn, self._lock = self._connect(self.path)
+
+    @classmethod
+    def _connect(cls, path: str) -> Tuple[sqlite3.Connection, threading.Lock]:
+        with cls._CONNECTIONS_LOCK:
+            cached = cls._CONNECTIONS.get(path)
+            if cached is not None:
+                return cached
+
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS kv (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            conn.commit()
+            cls._CONNECTIONS[path] = (conn, threading.Lock())
+            return cls._CONNECTIONS[path]
+
+    def get_with_expiry(self, key: str) -> Tuple[Any, Optional[float]]:
+        """返回 (value, expires_at)；不存在或已过期返回 (None, None)。"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM kv WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None:
+                return None, None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= time.time():
+                self._conn.execute(
+                    "DELETE FROM kv WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                )
+                self._conn.commit()
+                return None, None
+        try:
+            return json.loads(value), expires_at
+        except Exception:
+            return None, None
+
+    def get(self, key: str) -> Any:
+        return self.get_with_expiry(key)[0]
+
+    def put(self, key: str, value: Any, expires_at: Optional[float] = None) -> None:
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kv (namespace, key, value, expires_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, payload, expires_at, time.time()),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM kv WHERE namespace = ? AND key = ?", (self.namespace, key)
+            )
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM kv WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+                (self.namespace, time.time()),
+            )
+            self._conn.commit()
+            return cur.rowcount or 0
+
+
+class TieredCache:
+    """
+    两级缓存：内存 LRU（热数据）+ SQLite（跨进程/重启保留）。
+    path 为空时只使用内存层；磁盘层异常不影响主流程，仅降级为内存缓存。
+    """
+
+    def __init__(self, namespace: str, path: Optional[str] = None, memory_size: int = 256):
+        self.memory = LRUCache(memory_size)
+        self.disk: Optional[SqliteStore] = None
+        if path:
+            try:
+                self.disk = SqliteStore(path, namespace)
+                self.disk.purge_expired()
+            except Exception as exc:  # pylint: disable=broad-except
+                print(f"缓存库 {path} 不可用，退化为内存缓存：{exc}")
+                self.disk = None
+
+    def get(self, key: str) -> Any:
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        if self.disk is None:
+            return None
+        try:
+            value, expires_at = self.disk.get_with_expiry(key)
+        except Exception:  # pylint: disable=broad-except
+            return None
+        if value is not None:
+            self.memory.put(key, value, expires_at)
+        return value
+
+    def put(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        self.memory.put(key, value, expires_at)
+        if self.disk is None:
+            return
+        try:
+            self.disk.put(key, value, expires_at)
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+    def delete(self, key: str) -> None:
+        self.memory.delete(key)
+        if self.disk is None:
+            return
+        try:
+            self.disk.delete(key)
+        except Exception:  # pylint: disable=broad-except
+            pass
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+网页清洗一致性校验：对比单次解析实现 _extract_clean_body_html 与旧实现
+_clean_body_html(_extract_body_html(...)) 的输出（默认解析器 html.parser 下应完全一致）。
+
+样本包括内置的典型页面、随机生成的嵌套页面，以及命令行给出的 HTML 文件或目录。
+
+用法：
+    python check_html_clean_parity.py [HTML 文件或目录 ...] [--random N] [--parser html.parser|lxml]
+
+有不一致时打印前几个差异并以退出码 1 结束。使用 --parser lxml 可查看 lxml 与旧实现的差异（预期不为 0）。
+"""
+import os
+import random
+import sys
+from pathlib import Path
+
+sys.path.append(os.path.dirname(__file__))
+
+import search_service as ss
+
+_SAMPLES = [
+    """<!doctype html><html><head><title>t</title><script>x</script></head><body class="main" data-x="1">
+<!-- c --><div class="content"><h1>标题</h1><p>正文 段落 <a href="/a.pdf">附件</a> <a href="/x.html">x</a></p>
+<div class="nav-bar">nav</div><div role="dialog">d</div><ul><li>l</li></ul>
+<table><tr><td data-id="3">博彩 赌场</td><td>ok</td></tr></table><img src="a.png" alt="a"/>
+<section><p>投注</p><p>长文本</p></section><div id="popup">p</div><p>&nbsp;&amp; x</p></div></body></html>""",
+    "<div class='x'>no body 博彩<p>a</p><script>1</script></div><p data='q'>t</p>",
+    "<html><body class='modal-open'><p>x</p></body></html>",
+    "<html><body><div><p>" + "文字" * 400 + "博彩</p></div><div>博彩 赌场<p>投注</p></div></body></html>",
+    "<html><body><table><tr><td><table><tr><td>内层</td></tr></table></td></tr></table><p>未闭合<div>块</p></div></body></html>",
+]
+
+_TAGS = ["div", "p", "section", "span", "a", "td", "article", "b", "img", "li", "time", "aside"]
+_ATTRS = [
+    (0.1, ' class="nav"'),
+    (0.2, ' id="float-x"'),
+    (0.3, ' data-k="v" href="/f.docx"'),
+    (0.35, ' role="alertdialog"'),
+    (0.45, ' src="z"'),
+]
+
+
+def _random_fragment(rng: random.Random, depth: int = 0) -> str:
+    if depth > 5:
+        return rng.choice(["text", "博彩", "赌场 投注", "hello"])
+    out = []
+    for _ in range(rng.randint(1, 4)):
+        tag = rng.choice(_TAGS)
+        r = rng.random()
+        attrs = next((a for limit, a in _ATTRS if r < limit), "")
+        if rng.random() < 0.1:
+            out.append("<!-- cm -->")
+        out.append(f"<{tag}{attrs}>{_random_fragment(rng, depth + 1)}</{tag}>")
+        out.append(rng.choice(["", " tail ", "博彩"]))
+    return "".join(out)
+
+
+def _collect(paths):
+    for arg in paths:
+        p = Path(arg)
+        if p.is_dir():
+            for f in sorted(p.rglob("*.htm*")):
+                yield str(f), f.read_text(encoding="utf-8", errors="replace")
+        elif p.is_file():
+            yield str(p), p.read_text(encoding="utf-8", errors="replace")
+
+
+def main():
+    args = sys.argv[1:]
+    count = 300
+    parser = "html.parser"
+    paths = []
+    while args:
+        arg = args.pop(0)
+        if arg == "--random" and args:
+            count = int(args.pop(0))
+        elif arg == "--parser" and args:
+            parser = args.pop(0)
+        else:
+            paths.append(arg)
+
+    if ss.BeautifulSoup is None:
+        print("未安装 beautifulsoup4，无法校验")
+        sys.exit(2)
+    ss.config.config_data["html_parser"] = parser
+
+    rng = random.Random(1)
+    pages = [(f"sample-{i}", h) for i, h in enumerate(_SAMPLES)]
+    pages += [(f"random-{i}", f"<html><body>{_random_fragment(rng)}</body></html>") for i in range(count)]
+    pages += list(_collect(paths))
+
+    mismatches = 0
+    for name, html in pages:
+        legacy = ss._clean_body_html(ss._extract_body_html(html))
+        single = ss._extract_clean_body_html(html)
+        if legacy != single:
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"不一致：{name}\n  legacy: {legacy[:300]}\n  single: {single[:300]}")
+
+    print(f"解析器 {parser}：{len(pages)} 个页面，不一致 {mismatches} 个")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from config import ConfigHelper
+
+config = ConfigHelper()
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DocStore:
+    """
+    按内容寻址的文档仓库：
+    - 文件按字节的 sha256 存放在 root/objects/<前两位>/<digest>.<ext>，相同内容只存一份；
+    - SQLite 索引记录 URL -> digest，重复 URL 直接命中，不同 URL 的镜像文件落到同一 digest；
+    - 由文档派生的结果（解析 JSON 等）放在 derived_dir(digest)，随文档一起复用和淘汰；
+    - 正在使用的文档通过 hold()/acquire() 计数引用，淘汰时跳过；
+    - 总大小超过 max_bytes 时按最近访问时间（LRU）淘汰未被引用的文档。
+    """
+
+    def __init__(self, root: str, max_bytes: int = 0):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.derived = self.root / "derived"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.derived.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max(0, int(max_bytes))
+
+        self._lock = threading.Lock()
+        self._refs: Dict[str, int] = {}
+        self._conn = sqlite3.connect(
+            str(self.root / "index.sqlite3"), check_same_thread=False, timeout=30
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                ext TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS urls_digest ON urls (digest)")
+        self._conn.commit()
+
+    def object_path(self, digest: str, ext: str) -> Path:
+        return self.objects / digest[:2] / f"{digest}.{ext.lstrip('.')}"
+
+    def derived_dir(self, digest: str) -> Path:
+        """该文档派生结果的目录（按需创建）。"""
+        path = self.derived / digest[:2] / digest
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def digest_of(self, path: Path) -> Optional[str]:
+        """仓库内文件路径 -> digest；不在仓库内返回 None。"""
+        path = Path(path)
+        try:
+            path.resolve().relative_to(self.objects.resolve())
+        except ValueError:
+            return None
+        return path.stem
+
+    def _touch(self, digest: str) -> None:
+        self._conn.execute(
+            "UPDATE blobs SET last_access = ? WHERE digest = ?", (time.time(), digest)
+        )
+        self._conn.commit()
+
+    def _drop(self, digest: str, ext: str) -> None:
+        """删除文档及其派生结果与 URL 索引（调用方持有锁）。"""
+        try:
+            self.object_path(digest, ext).unlink()
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(self.derived / digest[:2] / digest, ignore_errors=True)
+        self._conn.execute("DELETE FROM urls WHERE digest = ?", (digest,))
+        self._conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+        self._conn.commit()
+
+    def lookup_url(self, url: str, hold: bool = False) -> Optional[Path]:
+        """
+        URL 已下载过且文件仍在时返回本地路径，并刷新访问时间。
+        hold=True 时在同一把锁内加引用后再返回，调用方用完需 release_path()。
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT b.digest, b.ext FROM urls u JOIN blobs b ON b.digest = u.digest WHERE u.url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            digest, ext = row
+            path = self.object_path(digest, ext)
+            if not path.exists():
+                # 文件被手动删除：索引作废
+                self._drop(digest, ext)
+                return None
+            self._touch(digest)
+            if hold:
+                self._refs[digest] = self._refs.get(digest, 0) + 1
+            return path
+
+    def ingest(self, tmp_path: Path, url: str, ext: str, hold: bool = False) -> Path:
+        """
+        把下载好的临时文件放入仓库并记录 URL；内容已存在时丢弃临时文件、复用已有副本。
+        入库后按容量上限淘汰。hold=True 时返回的路径仍持有引用，调用方用完需 release_path()。
+        """
+        tmp_path = Path(tmp_path)
+        digest = sha256_file(tmp_path)
+        size = tmp_path.stat().st_size
+        ext = ext.lstrip(".")
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ext FROM blobs WHERE digest = ?", (digest,)
+            ).fetchone()
+            if row is not None and self.object_path(digest, row[0]).exists():
+                ext = row[0]
+                tmp_path.unlink()
+            else:
+                dst = self.object_path(digest, ext)
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, dst)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blobs (digest, ext, size, created_at, last_access) "
+                "VALUES (?, ?, ?, COALESCE((SELECT created_at FROM blobs WHERE digest = ?), ?), ?)",
+                (digest, ext, size, digest, now, now),
+            )
+            if url:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO urls (url, digest, updated_at) VALUES (?, ?, ?)",
+                    (url, digest, now),
+                )
+            self._conn.commit()
+            # 刚入库的文件由调用方马上使用，淘汰时跳过
+            self._refs[digest] = self._refs.get(digest, 0) + 1
+        try:
+            self.evict()
+        finally:
+            if not hold:
+                self.release(digest)
+        return self.object_path(digest, ext)
+
+    def acquire(self, digest: str) -> None:
+        with self._lock:
+            self._refs[digest] = self._refs.get(digest, 0) + 1
+            self._touch(digest)
+
+    def release(self, digest: str) -> None:
+        with self._lock:
+            count = self._refs.get(digest, 0) - 1
+            if count > 0:
+                self._refs[digest] = count
+            else:
+                self._refs.pop(digest, None)
+
+    def release_path(self, path: Path) -> None:
+        """释放 lookup_url/ingest(hold=True) 返回路径上的引用；path 不在仓库内时不做任何事。"""
+        digest = self.digest_of(path)
+        if digest:
+            self.release(digest)
+
+    @contextmanager
+    def hold(self, path: Path):
+        """使用期间引用该文档，防止被淘汰；path 不在仓库内时不做任何事。"""
+        digest = self.digest_of(path)
+        if digest:
+            self.acquire(digest)
+        try:
+            yield digest
+        finally:
+            if digest:
+                self.release(digest)
+
+    def evict(self) -> Tuple[int, int]:
+        """按 LRU 淘汰未被引用的文档直到总大小不超过 max_bytes，返回 (淘汰个数, 释放字节)。"""
+        if not self.max_bytes:
+            return 0, 0
+        removed = freed = 0
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0, 0
+            rows = self._conn.execute(
+                "SELECT digest, ext, size FROM blobs ORDER BY last_access ASC"
+            ).fetchall()
+            for digest, ext, size in rows:
+                if total <= self.max_bytes:
+                    break
+                if self._refs.get(digest):
+                    continue
+                self._drop(digest, ext)
+                total -= size
+                removed += 1
+                freed += size
+        return removed, freed
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            blobs, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()
+            urls = self._conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+        return {"documents": blobs, "bytes": size, "urls": urls, "held": len(self._refs)}
+
+
+_STORE: Optional[DocStore] = None
+_STORE_FAILED = False
+_STORE_LOCK = threading.Lock()
+
+
+def get_doc_store() -> Optional[DocStore]:
+    """进程内共用的文档仓库；doc_store_enabled=false 或初始化失败时返回 None（退回普通下载目录）。"""
+    global _STORE, _STORE_FAILED  # pylint: disable=global-statement
+    if not config.get("doc_store_enabled", True):
+        return None
+    with _STORE_LOCK:
+        if _STORE is None and not _STORE_FAILED:
+            try:
+                _STORE = DocStore(
+                    root=config.get("doc_store_dir", "download"),
+                    max_bytes=int(config.get("doc_store_max_bytes", 2 * 1024 ** 3) or 0),
+                )
+            except Exception as exc:  # pylint: disable=broad-except
+                print(f"文档仓库不可用，退化为普通下载目录：{exc}")
+                _STORE_FAILED = True
+    return _STORE
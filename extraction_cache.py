@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# 解析结果中逐条存储的列表字段：PDF 为 pages，DOC/DOCX 为 blocks
+_ITEM_KEYS = ("pages", "blocks")
+
+
+def save_extraction(path: Path, data: Dict[str, Any]) -> Path:
+    """
+    把解析器输出的 dict 存为 JSONL：第一行是除 pages/blocks 外的头信息，之后每行一页/一块；
+    各行的字节偏移写入同名 .idx 文件，供按页随机读取。
+    先写入带唯一后缀的临时文件再原子改名：同一文档被并发解析时各写各的临时文件，互不覆盖；
+    先替换数据文件再替换索引（同一 digest + 版本的解析结果相同，偏移一致）。
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    items_key = next((k for k in _ITEM_KEYS if k in data), "")
+    header = {k: v for k, v in data.items() if k != items_key}
+    header["items_key"] = items_key
+
+    suffix = f".{os.getpid()}.{uuid.uuid4().hex}.tmp"
+    tmp = path.with_name(path.name + suffix)
+    offsets: List[int] = []
+    with open(tmp, "wb") as f:
+        f.write(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n")
+        for item in data.get(items_key) or []:
+            offsets.append(f.tell())
+            f.write(json.dumps(item, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    idx_tmp = path.with_name(path.name + ".idx" + suffix)
+    try:
+        with open(idx_tmp, "w", encoding="utf-8") as f:
+            json.dump(offsets, f)
+        os.replace(tmp, path)
+        os.replace(idx_tmp, path.with_name(path.name + ".idx"))
+    finally:
+        for leftover in (tmp, idx_tmp):
+            try:
+                leftover.unlink()
+            except OSError:
+                pass
+    return path
+
+
+class LazyExtraction:
+    """
+    按需读取的解析结果：打开时只读头信息与偏移索引，页/块内容在访问时才从磁盘读取并解析。
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self.header: Dict[str, Any] = json.loads(f.readline())
+        with open(self.path.with_name(self.path.name + ".idx"), "r", encoding="utf-8") as f:
+            self._offsets: List[int] = json.load(f)
+        self.items_key: str = self.header.pop("items_key", "") or "pages"
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def items(self, indices: Optional[Iterable[int]] = None) -> Iterator[Dict[str, Any]]:
+        """按顺序逐条产出；indices 为空时产出全部，否则按给定下标（从 0 开始）逐条读取。"""
+        with open(self.path, "rb") as f:
+            if indices is None:
+                f.seek(self._offsets[0] if self._offsets else 0)
+                for _ in self._offsets:
+                    yield json.loads(f.readline())
+                return
+            for index in indices:
+                f.seek(self._offsets[index])
+                yield json.loads(f.readline())
+
+    def to_dict(self, indices: Optional[Iterable[int]] = None) -> Dict[str, Any]:
+        data = dict(self.header)
+        data[self.items_key] = list(self.items(indices))
+        return data
+
+    def to_json(self, indices: Optional[Iterable[int]] = None) -> str:
+        """还原为与解析器输出相同结构的 JSON 字符串（可只取部分页/块）。"""
+        return json.dumps(self.to_dict(indices), ensure_ascii=False)
+
+
+class InMemoryExtraction:
+    """与 LazyExtraction 接口一致的内存版本：解析结果不可缓存（不在文档仓库内等）时使用。"""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.items_key: str = next((k for k in _ITEM_KEYS if k in data), "") or "pages"
+        self.header: Dict[str, Any] = {k: v for k, v in data.items() if k != self.items_key}
+        self._items: List[Dict[str, Any]] = list(data.get(self.items_key) or [])
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def items(self, indices: Optional[Iterable[int]] = None) -> Iterator[Dict[str, Any]]:
+        if indices is None:
+            return iter(self._items)
+        return (self._items[i] for i in indices)
+
+    def to_dict(self, indices: Optional[Iterable[int]] = None) -> Dict[str, Any]:
+        data = dict(self.header)
+        data[self.items_key] = list(self.items(indices))
+        return data
+
+    def to_json(self, indices: Optional[Iterable[int]] = None) -> str:
+        return json.dumps(self.to_dict(indices), ensure_ascii=False)
+
+
+def load_extraction(path: Path) -> Optional[LazyExtraction]:
+    """缓存不存在或损坏时返回 None。"""
+    path = Path(path)
+    if not path.exists():
+        return None
+    try:
+        return LazyExtraction(path)
+    except Exception:  # pylint: disable=broad-except
+        return None
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from config import ConfigHelper
+
+config = ConfigHelper()
+
+
+class _HostState:
+    """单个域名的令牌桶与在途请求计数。"""
+
+    __slots__ = ("tokens", "updated_at", "inflight")
+
+    def __init__(self, burst: float):
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self.inflight = 0
+
+
+class HostScheduler:
+    """
+    按域名节流的请求调度器：
+    - 每个域名一个令牌桶：两次请求开始之间至少间隔 min_interval 秒（允许 burst 个突发）；
+    - 每个域名同时在途的请求不超过 max_inflight；
+    - 所有域名合计在途请求不超过 global_max_inflight。
+    不同域名之间互不等待，只对同一站点保持礼貌。
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 1.0,
+        max_inflight: int = 2,
+        global_max_inflight: int = 8,
+        burst: int = 1,
+    ):
+        self.min_interval = max(0.0, float(min_interval))
+        self.max_inflight = max(1, int(max_inflight))
+        self.global_max_inflight = max(1, int(global_max_inflight))
+        self.burst = max(1, int(burst))
+        self._hosts: Dict[str, _HostState] = {}
+        self._global_inflight = 0
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        try:
+            return (urlparse(url).hostname or "").lower()
+        except Exception:
+            return ""
+
+    def _refill(self, state: _HostState, interval: float, now: float) -> None:
+        if interval <= 0:
+            state.tokens = float(self.burst)
+        else:
+            state.tokens = min(
+                float(self.burst), state.tokens + (now - state.updated_at) / interval
+            )
+        state.updated_at = now
+
+    def acquire(self, url: str, min_interval: Optional[float] = None) -> str:
+        """阻塞直到该域名可以发起请求，返回用于 release 的域名。"""
+        host = self.host_of(url)
+        interval = self.min_interval if min_interval is None else max(0.0, float(min_interval))
+
+        with self._cond:
+            state = self._hosts.get(host)
+            if state is None:
+                state = self._hosts[host] = _HostState(float(self.burst))
+
+            while True:
+                now = time.monotonic()
+                self._refill(state, interval, now)
+
+                wait: Optional[float] = None
+                if state.tokens < 1.0:
+                    wait = (1.0 - state.tokens) * interval
+                elif (
+                    state.inflight < self.max_inflight
+                    and self._global_inflight < self.global_max_inflight
+                ):
+                    state.tokens -= 1.0
+                    state.inflight += 1
+                    self._global_inflight += 1
+                    return host
+
+                # 令牌不足时按补充时间等待；并发满时等 release 唤醒
+                self._cond.wait(timeout=wait)
+
+    def release(self, host: str) -> None:
+        with self._cond:
+            state = self._hosts.get(host)
+            if state is not None and state.inflight > 0:
+                state.inflight -= 1
+            if self._global_inflight > 0:
+                self._global_inflight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, url: str, min_interval: Optional[float] = None):
+        """with 形式占用一个请求名额，块结束（含异常）时自动释放。"""
+        host = self.acquire(url, min_interval=min_interval)
+        try:
+            yield host
+        finally:
+            self.release(host)
+
+
+_SCHEDULER: Optional[HostScheduler] = None
+_SCHEDULER_LOCK = threading.Lock()
+
+
+def get_host_scheduler() -> HostScheduler:
+    """进程内共用的调度器，参数取自 setting.json。"""
+    global _SCHEDULER  # pylint: disable=global-statement
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is None:
+            _SCHEDULER = HostScheduler(
+                min_interval=float(config.get("fetch_host_min_interval", 1.0) or 0.0),
+                max_inflight=int(config.get("fetch_host_max_inflight", 2) or 2),
+                global_max_inflight=int(config.get("fetch_global_max_inflight", 8) or 8),
+                burst=int(config.get("fetch_host_burst", 1) or 1),
+            )
+    return _SCHEDULER
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from config import ConfigHelper
+
+config = ConfigHelper()
+
+_DEFAULT_USER_AGENT = "PolyMindBot/1.0"
+
+_ADAPTER: Optional[HTTPAdapter] = None
+_ADAPTER_LOCK = threading.Lock()
+_SESSION_LOCAL = threading.local()
+
+_STATS_LOCK = threading.Lock()
+_STATS: Dict[str, int] = {"requests": 0, "errors": 0}
+# scheme://host:port -> {"connections": 实际建立的 TCP 连接数, "requests": 在连接上发出的请求数}
+_HOST_STATS: Dict[str, Dict[str, int]] = {}
+
+
+def _record(conn: HTTPConnection, field: str) -> None:
+    scheme = "https" if isinstance(conn, HTTPSConnection) else "http"
+    port = conn.port or (443 if scheme == "https" else 80)
+    name = f"{scheme}://{conn.host}:{port}"
+    with _STATS_LOCK:
+        item = _HOST_STATS.setdefault(name, {"connections": 0, "requests": 0})
+        item[field] += 1
+
+
+class _CountingConnectionMixin:
+    """每次真正建立 socket（含同一连接对象断开后的重连）与每次发出请求都计数。"""
+
+    def connect(self):
+        super().connect()
+        _record(self, "connections")
+
+    def request(self, *args, **kwargs):  # pylint: disable=arguments-differ
+        _record(self, "requests")
+        return super().request(*args, **kwargs)
+
+    def request_chunked(self, *args, **kwargs):  # urllib3 < 2 的分块请求
+        _record(self, "requests")
+        return super().request_chunked(*args, **kwargs)
+
+
+class _CountingHTTPConnection(_CountingConnectionMixin, HTTPConnection):
+    pass
+
+
+class _CountingHTTPSConnection(_CountingConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+_COUNTING_POOL_CLASSES = {
+    "http": _CountingHTTPConnectionPool,
+    "https": _CountingHTTPSConnectionPool,
+}
+
+
+class _CountingAdapter(HTTPAdapter):
+    """连接池使用计数连接类，供 get_connection_stats 统计真实的建连次数。"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = dict(_COUNTING_POOL_CLASSES)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        manager.pool_classes_by_scheme = dict(_COUNTING_POOL_CLASSES)
+        return manager
+
+
+def _build_retry() -> Retry:
+    """只对幂等请求（GET/HEAD/OPTIONS）在连接失败与 429/5xx 时退避重试；POST 由调用方自行重试。"""
+    kwargs: Dict[str, Any] = dict(
+        total=int(config.get("http_max_retries", 2) or 0),
+        backoff_factor=float(config.get("http_retry_backoff", 0.5) or 0.0),
+        status_forcelist=(429, 500, 502, 503, 504),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    methods = frozenset({"GET", "HEAD", "OPTIONS"})
+    try:
+        return Retry(allowed_methods=methods, **kwargs)
+    except TypeError:  # pragma: no cover - urllib3 < 1.26
+        return Retry(method_whitelist=methods, **kwargs)
+
+
+def _get_adapter() -> HTTPAdapter:
+    """进程内共用的连接池适配器：按 host 维护 keep-alive 连接池，池数量与单池连接数有上限。"""
+    global _ADAPTER  # pylint: disable=global-statement
+    with _ADAPTER_LOCK:
+        if _ADAPTER is None:
+            _ADAPTER = _CountingAdapter(
+                pool_connections=int(config.get("http_pool_hosts", 32) or 32),
+                pool_maxsize=int(config.get("http_pool_maxsize", 8) or 8),
+                max_retries=_build_retry(),
+                pool_block=False,
+            )
+    return _ADAPTER
+
+
+def get_session() -> requests.Session:
+    """
+    当前线程的 Session。Session 的 cookie 等状态不是线程安全的，所以每个线程一个，
+    但都挂载同一个适配器，底层连接池在全部线程之间共享复用。
+    """
+    session = getattr(_SESSION_LOCAL, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = _get_adapter()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["User-Agent"] = _DEFAULT_USER_AGENT
+        _SESSION_LOCAL.session = session
+    return session
+
+
+def _normalize_timeout(
+    timeout: Union[None, float, Tuple[float, float]]
+) -> Tuple[float, float]:
+    """统一为 (连接超时, 读取超时)：连接阶段不超过 http_connect_timeout，读取沿用调用方给的秒数。"""
+    connect = float(config.get("http_connect_timeout", 5) or 5)
+    if timeout is None:
+        return connect, float(config.get("http_read_timeout", 30) or 30)
+    if isinstance(timeout, tuple):
+        return timeout
+    return min(connect, float(timeout)), float(timeout)
+
+
+def request(method: str, url: str, timeout=None, **kwargs) -> requests.Response:
+    """经共享连接池发起请求，参数与 requests.request 一致。"""
+    with _STATS_LOCK:
+        _STATS["requests"] += 1
+    try:
+        return get_session().request(method, url, timeout=_normalize_timeout(timeout), **kwargs)
+    except Exception:
+        with _STATS_LOCK:
+            _STATS["errors"] += 1
+        raise
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    kwargs.setdefault("allow_redirects", True)
+    return request("GET", url, **kwargs)
+
+
+def head(url: str, **kwargs) -> requests.Response:
+    kwargs.setdefault("allow_redirects", False)
+    return request("HEAD", url, **kwargs)
+
+
+def post(url: str, data=None, json=None, **kwargs) -> requests.Response:
+    return request("POST", url, data=data, json=json, **kwargs)
+
+
+def get_connection_stats() -> Dict[str, Any]:
+    """
+    连接复用统计：
+    - requests / errors：经本模块发出的请求数与异常数；
+    - connections：实际建立的 TCP(+TLS) 连接数（按 socket 建立计数，同一连接对象断开重连也算一次）；
+    - requests_on_pool：在连接上实际发出的请求数（含重定向、重试）；
+    - reused：requests_on_pool - connections，即未新建连接的请求数；reuse_ratio：reused / requests_on_pool；
+    - hosts：按 scheme://host:port 细分的 connections / requests（进程启动以来累计）。
+    """
+    with _STATS_LOCK:
+        out: Dict[str, Any] = dict(_STATS)
+        hosts = {name: dict(item) for name, item in _HOST_STATS.items()}
+
+    connections = sum(h["connections"] for h in hosts.values())
+    pool_requests = sum(h["requests"] for h in hosts.values())
+    reused = max(0, pool_requests - connections)
+    out.update(
+        connections=connections,
+        requests_on_pool=pool_requests,
+        reused=reused,
+        reuse_ratio=round(reused / pool_requests, 3) if pool_requests else 0.0,
+        hosts=hosts,
+    )
+    return out
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import json
+from typing import Any, Dict, List
+
+
+class JsonArrayStream:
+    """
+    增量解析流式输出中的 JSON 数组：逐段 feed 文本，数组里的对象元素一闭合就返回，不必等整段输出结束。
+    - 第一个 '[' 之前的内容（如 {"question_list": 或说明文字）忽略；
+    - 只产出顶层的对象元素，元素之间的逗号、空白、中文逗号等一律跳过；
+    - 单个元素解析失败时跳过，最终仍以完整输出的解析结果为准。
+    """
+
+    def __init__(self):
+        self.items: List[Dict[str, Any]] = []
+        self._buf: List[str] = []
+        self._started = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """喂入一段新文本，返回本段内新闭合的元素。"""
+        completed: List[Dict[str, Any]] = []
+        for ch in text or "":
+            if self._done:
+                break
+            if not self._started:
+                if ch == "[":
+                    self._started = True
+                continue
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._buf = [ch]
+                elif ch == "]":
+                    self._done = True
+                continue
+
+            self._buf.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        item = json.loads("".join(self._buf))
+                    except ValueError:
+                        item = None
+                    self._buf = []
+                    if isinstance(item, dict):
+                        self.items.append(item)
+                        completed.append(item)
+        return completed
@@ -1,6 +1,23 @@
-from api_model import QwenModel
+from api_model import AIStream, QwenModel, SearchDispatcher
 import json
-from search_service import web_search
+from json_stream import JsonArrayStream
+
+
+class _QuestionDispatchStream(AIStream):
+    """边生成边解析问题数组：每闭合一个 {id, question, time} 就提交搜索，搜索与剩余生成同时进行。"""
+
+    def __init__(self, dispatcher: SearchDispatcher):
+        super().__init__()
+        self.dispatcher = dispatcher
+        self.parser = JsonArrayStream()
+
+    def process_chunk(self, chunk):
+        for item in self.parser.feed(chunk):
+            self.dispatcher.submit(item)
+
+    def reset(self):
+        super().reset()
+        self.parser = JsonArrayStream()
 
 
 def create_webquestion_from_user(
@@ -56,35 +73,37 @@ def create_webquestion_from_user(
 
     user_prompt = user_message
 
-    answer, reasoning, web_content_list, references = qwen_model.do_call(
-        system_prompt, user_prompt, temperature=0.5, no_search=True
-    )
-
-    answer = answer.strip()
-    start_index = answer.find("[")
-    end_index = answer.rfind("]")
-
-    if start_index != -1 and end_index != -1:
-        answer = answer[start_index:end_index + 1]
-    else:
-        raise ValueError("无法从回答中提取JSON对象")
-
-    data = json.loads(answer)
-
-    results = []
-    for item in data:
-        question = item.get("question","")
-        time_range = item.get("time","none")
-
-        print("\n正在搜索的问题:", question, "\n")
-        web_content = web_search(question, time_range)
-
-        results.append({
-            "question": question,
-            "result": web_content
-        })
-
-    return results
+    dispatcher = SearchDispatcher()
+    try:
+        answer, reasoning, web_content_list, references = qwen_model.do_call(
+            system_prompt,
+            user_prompt,
+            stream=_QuestionDispatchStream(dispatcher),
+            temperature=0.5,
+            no_search=True,
+        )
+
+        answer = answer.strip()
+        start_index = answer.find("[")
+        end_index = answer.rfind("]")
+
+        if start_index != -1 and end_index != -1:
+            answer = answer[start_index:end_index + 1]
+        else:
+            raise ValueError("无法从回答中提取JSON对象")
+
+        data = json.loads(answer)
+
+        # 以完整输出为准：流式阶段已派发的问题直接等待结果，漏掉的问题此时补提交
+        results = []
+        for item in data:
+            result = dispatcher.result(item)
+            if result is not None:
+                results.append(result)
+
+        return results
+    finally:
+        dispatcher.close()
 
 def sanitize_knowledge_base(knowledge_text):
     """剔除推荐、方案类内容，仅保留理解所需信息。"""
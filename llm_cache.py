@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Optional
+
+from cache_store import TieredCache
+from config import ConfigHelper
+
+config = ConfigHelper()
+
+_MODES = ("off", "readwrite", "replay")
+
+
+class LLMCacheMiss(RuntimeError):
+    """replay 模式下请求未命中缓存。"""
+
+
+def cache_mode() -> str:
+    """llm_cache_mode：off（默认，不缓存）/ readwrite（命中复用、未命中调用后写入）/ replay（只读，未命中报错）。"""
+    mode = str(config.get("llm_cache_mode", "off") or "off").lower()
+    return mode if mode in _MODES else "off"
+
+
+_CACHE: Optional[TieredCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def _get_cache() -> TieredCache:
+    global _CACHE  # pylint: disable=global-statement
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = TieredCache(
+                namespace="llm",
+                path=config.get("llm_cache_path", "cache/llm_cache.sqlite3"),
+                memory_size=int(config.get("llm_cache_memory_size", 128) or 128),
+            )
+    return _CACHE
+
+
+def make_key(kind: str, params: Dict[str, Any]) -> str:
+    """
+    按调用类型与请求参数（模型、消息、工具、采样参数等，不含 API Key）生成缓存键：
+    参数按键排序后序列化再取 sha256，字节完全相同的请求得到同一个键。
+    """
+    payload = json.dumps(
+        {"kind": kind, "params": params}, ensure_ascii=False, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def lookup(key: str) -> Optional[Dict[str, Any]]:
+    """返回缓存的响应；off 模式或未命中返回 None，replay 模式未命中抛 LLMCacheMiss。"""
+    mode = cache_mode()
+    if mode == "off":
+        return None
+    value = _get_cache().get(key)
+    if value is None and mode == "replay":
+        raise LLMCacheMiss(f"LLM 缓存未命中（replay 模式）：{key[:16]}")
+    return value
+
+
+def store(key: str, value: Dict[str, Any]) -> None:
+    """readwrite 模式下写入响应；其他模式不写。"""
+    if cache_mode() != "readwrite":
+        return
+    _get_cache().put(key, value, ttl=config.get("llm_cache_ttl", 0) or None)
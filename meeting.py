@@ -1,6 +1,5 @@
 from datetime import datetime
 import json
-import time
 import uuid
 from knowledge import create_webquestion_from_user,rrange_knowledge
 from api_model import QwenModel, AIStream
@@ -681,8 +680,9 @@ def create_roles(qwen_model: QwenModel, content, knowledges, stream=None):
 
     data = json.loads(answer)
 
-    for role in data:
-        role["role_id"] = str(uuid.uuid4())
+    # 角色 ID 由序号与姓名确定性生成，同一输入每次运行得到相同的提示词（便于 LLM 缓存复用）
+    for index, role in enumerate(data):
+        role["role_id"] = str(uuid.uuid5(uuid.NAMESPACE_OID, f"{index}:{role.get('role_name', '')}"))
         role["role_job"] = ""  # 占位以兼容后续流程，不提供任何职业信息
         role["personality"] = role.get("personality", "")
 
@@ -713,7 +713,6 @@ def start_meeting(qwen_model: QwenModel, content, stream: AIStream = None):
     print(knowledge_content)
 
     print("\n====基础知识库构建完成===\n")
-    time.sleep(5)
 
     print("\n====初步方案构建====\n")
     research_plan = create_initial_solution(qwen_model, content, knowledge_content)
@@ -727,7 +726,6 @@ def start_meeting(qwen_model: QwenModel, content, stream: AIStream = None):
     roles = create_roles(qwen_model, content, knowledge_content, stream=stream)
     print("\n====角色构建完成====\n")
 
-    time.sleep(5)
     print("\n====开始讨论===\n")
 
     epcho = 1
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import hashlib
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Deque, Dict, List, Optional, Tuple
+
+from config import ConfigHelper
+from relevance import estimate_tokens
+
+config = ConfigHelper()
+
+
+class _Ticket:
+    """一次调用在窗口中的占位：先按估算 token 记账，拿到 usage 后改为实际值。"""
+
+    __slots__ = ("at", "tokens")
+
+    def __init__(self, at: float, tokens: int):
+        self.at = at
+        self.tokens = tokens
+
+
+class RateGovernor:
+    """
+    按滑动窗口统计真实 RPM / TPM 的限流器（一个 模型 + API Key 一个实例）：
+    - acquire：窗口内请求数与 token 数（已完成调用用 usage 实际值，进行中的用估算值）都未超限时立即放行；
+      只有放行会超限时，才等到最早的记录滑出窗口；
+    - commit：调用结束后用 usage.total_tokens 修正该次记账；
+    - pause：服务端返回限流（429/Throttling）时，在指定秒数内暂停放行。
+    rpm / tpm 为 0 表示不限制对应维度。
+    """
+
+    def __init__(self, rpm: int = 0, tpm: int = 0, window: float = 60.0):
+        self.rpm = max(0, int(rpm))
+        self.tpm = max(0, int(tpm))
+        self.window = float(window)
+        self._tickets: Deque[_Ticket] = deque()
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    def _expire(self, now: float) -> None:
+        while self._tickets and self._tickets[0].at <= now - self.window:
+            self._tickets.popleft()
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.rpm and len(self._tickets) >= self.rpm:
+            return self._tickets[0].at + self.window - now
+        if self.tpm and self._tickets:
+            used = sum(t.tokens for t in self._tickets)
+            # 单次估算超过 TPM 时只要求窗口为空，避免永远等不到
+            if used + tokens > self.tpm:
+                acc = used
+                for ticket in self._tickets:
+                    acc -= ticket.tokens
+                    if acc + tokens <= self.tpm:
+                        return ticket.at + self.window - now
+                return self._tickets[-1].at + self.window - now
+        return 0.0
+
+    def acquire(self, tokens: int = 0) -> _Ticket:
+        """阻塞直到可以发起一次预计消耗 tokens 的调用，返回用于 commit 的记账凭据。"""
+        tokens = max(0, int(tokens))
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                wait = self._wait_time(tokens, now)
+                if wait <= 0:
+                    ticket = _Ticket(now, tokens)
+                    self._tickets.append(ticket)
+                    return ticket
+                self._cond.wait(timeout=max(0.01, wait))
+
+    def commit(self, ticket: _Ticket, tokens: Optional[int]) -> None:
+        """用实际消耗修正记账；tokens 为空（未拿到 usage）时保留估算值。"""
+        if tokens is None:
+            return
+        with self._cond:
+            ticket.tokens = max(0, int(tokens))
+            self._cond.notify_all()
+
+    def pause(self, seconds: float) -> None:
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + max(0.0, seconds))
+            self._cond.notify_all()
+
+    def usage(self) -> Dict[str, int]:
+        """当前窗口内的请求数与 token 数。"""
+        with self._cond:
+            self._expire(time.monotonic())
+            return {"requests": len(self._tickets), "tokens": sum(t.tokens for t in self._tickets)}
+
+
+_GOVERNORS: Dict[Tuple[str, str], RateGovernor] = {}
+_GOVERNORS_LOCK = threading.Lock()
+
+
+def _limits_for(model: str) -> Tuple[int, int]:
+    """rate_limits 配置：{"qwen3-max": {"rpm": 60, "tpm": 1000000}, "default": {...}}，未配置的模型用 default。"""
+    limits = config.get("rate_limits") or {}
+    item = limits.get(model) or limits.get("default") or {}
+    rpm = item.get("rpm", config.get("llm_rpm", 60))
+    tpm = item.get("tpm", config.get("llm_tpm", 1000000))
+    return int(rpm or 0), int(tpm or 0)
+
+
+def get_governor(model: str, api_key: Optional[str]) -> RateGovernor:
+    """按 (模型, API Key) 共用的限流器；Key 只以摘要形式作为索引。"""
+    key_id = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+    with _GOVERNORS_LOCK:
+        governor = _GOVERNORS.get((model, key_id))
+        if governor is None:
+            rpm, tpm = _limits_for(model)
+            governor = _GOVERNORS[(model, key_id)] = RateGovernor(rpm=rpm, tpm=tpm)
+    return governor
+
+
+_LLM_SLOTS: Optional[threading.BoundedSemaphore] = None
+_LLM_SLOTS_LOCK = threading.Lock()
+
+
+def _llm_slots() -> threading.BoundedSemaphore:
+    """进程内所有大模型调用共用的在途上限（llm_concurrency，默认 8），不区分线程与事件循环。"""
+    global _LLM_SLOTS  # pylint: disable=global-statement
+    with _LLM_SLOTS_LOCK:
+        if _LLM_SLOTS is None:
+            _LLM_SLOTS = threading.BoundedSemaphore(max(1, int(config.get("llm_concurrency", 8) or 8)))
+    return _LLM_SLOTS
+
+
+@contextmanager
+def llm_slot():
+    """同步调用占用一个在途名额，阻塞等待。"""
+    slots = _llm_slots()
+    slots.acquire()
+    try:
+        yield
+    finally:
+        slots.release()
+
+
+@asynccontextmanager
+async def allm_slot(poll: float = 0.05):
+    """
+    异步调用占用一个在途名额：非阻塞尝试 + 短暂 sleep 轮询，不占用线程池，也不阻塞事件循环；
+    等待期间被取消时不会遗留已占用的名额。
+    """
+    slots = _llm_slots()
+    while not slots.acquire(blocking=False):
+        await asyncio.sleep(poll)
+    try:
+        yield
+    finally:
+        slots.release()
+
+
+def is_throttling_error(exc: BaseException) -> bool:
+    msg = str(exc)
+    return "429" in msg or "Throttling" in msg or "RateQuota" in msg
+
+
+def estimate_message_tokens(messages: List[Dict]) -> int:
+    """按消息文本粗估本次调用的输入 token（中文约 1 字 1 token，其余约 4 字符 1 token）。"""
+    total = 0
+    for msg in messages or []:
+        content = msg.get("content") if isinstance(msg, dict) else None
+        if isinstance(content, str):
+            total += estimate_tokens(content)
+        elif isinstance(content, list):
+            for part in content:
+                if isinstance(part, dict) and isinstance(part.get("text"), str):
+                    total += estimate_tokens(part["text"])
+    return total
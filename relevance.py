@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence
+
+# 中日韩统一表意文字及常用扩展区
+_CJK_RE = re.compile(r"[㐀-䶿一-鿿豈-﫿]")
+_TOKEN_RE = re.compile(r"[㐀-䶿一-鿿豈-﫿]+|[a-z0-9]+")
+_SENTENCE_END_RE = re.compile(r"(?<=[。！？；!?;])")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中文约 1 字 1 token，其余字符约 4 个 1 token。"""
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def char_ngrams(text: str, n: int = 2) -> List[str]:
+    """中文按字 n-gram 切分（不足 n 的片段整体保留），英文/数字按词切分。"""
+    tokens: List[str] = []
+    for run in _TOKEN_RE.findall((text or "").lower()):
+        if not _CJK_RE.match(run):
+            tokens.append(run)
+        elif len(run) <= n:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + n] for i in range(len(run) - n + 1))
+    return tokens
+
+
+class BM25:
+    """对一组已切分的文档做 BM25 打分。"""
+
+    def __init__(self, docs: Sequence[Sequence[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.tfs = [Counter(doc) for doc in docs]
+        self.lengths = [len(doc) for doc in docs]
+        self.avg_len = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        df: Counter = Counter()
+        for tf in self.tfs:
+            df.update(tf.keys())
+        total = len(self.tfs)
+        self.idf = {
+            term: math.log(1 + (total - freq + 0.5) / (freq + 0.5)) for term, freq in df.items()
+        }
+
+    def scores(self, query: Sequence[str]) -> List[float]:
+        terms = [t for t in set(query) if t in self.idf]
+        out: List[float] = []
+        for tf, length in zip(self.tfs, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / (self.avg_len or 1.0))
+            score = 0.0
+            for term in terms:
+                freq = tf.get(term, 0)
+                if freq:
+                    score += self.idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            out.append(score)
+        return out
+
+
+def split_passages(text: str, max_chars: int = 300) -> List[str]:
+    """按行切分正文，短行并入后文、过长的行按句末标点再切，得到适合打分的段落。"""
+    pieces: List[str] = []
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if len(line) <= max_chars:
+            pieces.append(line)
+            continue
+        chunk = ""
+        for sent in _SENTENCE_END_RE.split(line):
+            if chunk and len(chunk) + len(sent) > max_chars:
+                pieces.append(chunk)
+                chunk = ""
+            chunk += sent
+            while len(chunk) > max_chars:
+                pieces.append(chunk[:max_chars])
+                chunk = chunk[max_chars:]
+        if chunk:
+            pieces.append(chunk)
+
+    passages: List[str] = []
+    buf = ""
+    for piece in pieces:
+        # 只把短行（标题、表格行等）并入后文，正常段落各自成段
+        if buf and (len(buf) >= max_chars // 4 or len(buf) + 1 + len(piece) > max_chars):
+            passages.append(buf)
+            buf = ""
+        buf = f"{buf}\n{piece}" if buf else piece
+    if buf:
+        passages.append(buf)
+    return passages
+
+
+def pack_pages(
+    question: str,
+    pages: List[Dict],
+    budget_tokens: int,
+    content_key: str = "web_content",
+    passage_chars: int = 300,
+) -> List[Dict]:
+    """
+    在 token 预算内挑选与问题最相关的正文段落：
+    - 每页的 title/source/publish_time/url/snippet 等归属字段原样保留；
+    - 各页正文切段后统一用 BM25（字 2-gram）对 question 打分，按分数从高到低装入预算；
+    - 入选段落按原文顺序拼回各自页面的 content_key，保证来源可追溯；
+    - 总量本就不超预算时原样返回。
+    pages 按优先级排序，预算连归属字段都放不下时从末尾丢弃整页。
+    """
+    if budget_tokens <= 0 or not pages:
+        return pages
+
+    meta_tokens = [
+        estimate_tokens(" ".join(str(v) for k, v in page.items() if k != content_key and v))
+        for page in pages
+    ]
+    content_tokens = [estimate_tokens(page.get(content_key) or "") for page in pages]
+    if sum(meta_tokens) + sum(content_tokens) <= budget_tokens:
+        return pages
+
+    kept = len(pages)
+    while kept > 1 and sum(meta_tokens[:kept]) > budget_tokens:
+        kept -= 1
+    remaining = budget_tokens - sum(meta_tokens[:kept])
+
+    passages: List[Dict] = []
+    for page_idx, page in enumerate(pages[:kept]):
+        for pos, text in enumerate(split_passages(page.get(content_key) or "", passage_chars)):
+            passages.append(
+                {"page": page_idx, "pos": pos, "text": text, "tokens": estimate_tokens(text)}
+            )
+
+    if passages:
+        scores = BM25([char_ngrams(p["text"]) for p in passages]).scores(char_ngrams(question))
+        order = sorted(
+            range(len(passages)),
+            key=lambda i: (-scores[i], passages[i]["page"], passages[i]["pos"]),
+        )
+        for i in order:
+            if passages[i]["tokens"] <= remaining:
+                passages[i]["selected"] = True
+                remaining -= passages[i]["tokens"]
+
+    selected: Dict[int, List[str]] = {}
+    for p in passages:
+        if p.get("selected"):
+            selected.setdefault(p["page"], []).append(p["text"])
+
+    packed: List[Dict] = []
+    for page_idx, page in enumerate(pages[:kept]):
+        item = dict(page)
+        item[content_key] = "\n".join(selected.get(page_idx, []))
+        packed.append(item)
+    return packed
+
+
+class TfIdf:
+    """对一组已切分的文档拟合 IDF，按余弦相似度给查询打分。"""
+
+    def __init__(self, docs: Sequence[Sequence[str]]):
+        df: Counter = Counter()
+        for doc in docs:
+            df.update(set(doc))
+        total = len(docs)
+        self.idf = {term: math.log((1 + total) / (1 + freq)) + 1 for term, freq in df.items()}
+        self.vectors = [self.vector(doc) for doc in docs]
+
+    def vector(self, tokens: Iterable[str]) -> Dict[str, float]:
+        """L2 归一化的 tf-idf 向量；未在语料中出现的词忽略。"""
+        tf = Counter(t for t in tokens if t in self.idf)
+        vec = {term: freq * self.idf[term] for term, freq in tf.items()}
+        norm = math.sqrt(sum(v * v for v in vec.values()))
+        return {term: v / norm for term, v in vec.items()} if norm else {}
+
+    @staticmethod
+    def cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+        if len(a) > len(b):
+            a, b = b, a
+        return sum(v * b.get(term, 0.0) for term, v in a.items())
+
+    def scores(self, query: Sequence[str]) -> List[float]:
+        q = self.vector(query)
+        return [self.cosine(q, vec) for vec in self.vectors]
+
+
+def select_pages(
+    question: str,
+    texts: List[str],
+    headings: List[str],
+    costs: List[int],
+    budget_tokens: int,
+    always: Sequence[int] = (),
+    heading_weight: float = 2.0,
+) -> List[int]:
+    """
+    在 token 预算内挑选与问题最相关的页，返回按原顺序排列的页下标：
+    - 每页得分 = 正文与问题的 TF-IDF（字 2-gram）余弦 + heading_weight × 标题与问题的余弦；
+    - always 中的页（如目录页）优先入选；
+    - 其余按得分从高到低装入预算，与问题毫无重合的页不选；都不相关时按原顺序取前面的页。
+    """
+    tfidf = TfIdf([char_ngrams(t) for t in texts])
+    query = char_ngrams(question)
+    q_vec = tfidf.vector(query)
+    scores = [
+        body + heading_weight * tfidf.cosine(q_vec, tfidf.vector(char_ngrams(head)))
+        for body, head in zip(tfidf.scores(query), headings)
+    ]
+
+    chosen: List[int] = []
+    remaining = budget_tokens
+    for idx in always:
+        if 0 <= idx < len(texts) and idx not in chosen and costs[idx] <= remaining:
+            chosen.append(idx)
+            remaining -= costs[idx]
+
+    ranked = sorted(
+        (i for i in range(len(texts)) if scores[i] > 0), key=lambda i: (-scores[i], i)
+    )
+    if not ranked:
+        ranked = list(range(len(texts)))
+    for idx in ranked:
+        if idx not in chosen and costs[idx] <= remaining:
+            chosen.append(idx)
+            remaining -= costs[idx]
+    return sorted(chosen)
@@ -281,9 +281,11 @@ def role_dissucess(
         stream,
     )
 
+    # 记录 ID 由轮次、发言序号与角色确定性生成，同一输入每次运行得到相同的提示词（便于 LLM 缓存复用）
+    record_id = uuid.uuid5(uuid.NAMESPACE_OID, f"{epcho}:{role_index}:{role['role_id']}")
     role_record = f"""
 
-    [研究员发言 "记录ID"="{str(uuid.uuid4())}" "角色姓名"="{role['role_name']}" "角色ID"="{role['role_id']}" "]
+    [研究员发言 "记录ID"="{record_id}" "角色姓名"="{role['role_name']}" "角色ID"="{role['role_id']}" "]
 
       {role_answer}
 
@@ -2,26 +2,47 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
 import re
 import uuid
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlparse
 
 from pathlib import Path
 
 import pdfplumber
 import dashscope
-import requests
 import shutil
 import subprocess
+import threading
+from requests.exceptions import RequestException
 from docx import Document
 from docx.table import Table
 from docx.text.paragraph import Paragraph
 from datetime import datetime
 import time
 
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+from cache_store import LRUCache
 from config import ConfigHelper
+from doc_store import get_doc_store
+from extraction_cache import InMemoryExtraction, LazyExtraction, load_extraction, save_extraction
+from rate_governor import estimate_message_tokens, get_governor, llm_slot
+from relevance import estimate_tokens, select_pages
+from soffice_pool import get_soffice_pool
+import http_client
+import llm_cache
+from host_scheduler import get_host_scheduler
 
 config = ConfigHelper()
 
@@ -105,11 +126,145 @@ def _extract_doc_url_candidates(result_content: str) -> List[str]:
     return out
 
 
+_OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+_DOC_KINDS = ("pdf", "doc", "docx")
+
+# 本地解析器输出结构的版本号，变化后已缓存的解析结果不再复用
+_EXTRACTOR_VERSION = 3
+
+
+def _sniff_kind(prefix: bytes, content_type: str = "") -> str:
+    """
+    根据响应体开头字节（魔数）判断类型：%PDF -> pdf，PK -> docx（zip 容器），OLE -> doc；
+    否则看是否像 HTML/文本。无法判断返回空字符串。
+    """
+    head = (prefix or b"")[:1024]
+    stripped = head.lstrip(b"\xef\xbb\xbf \t\r\n")
+    if stripped.startswith(b"%PDF"):
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        return "docx"
+    if head.startswith(_OLE_MAGIC):
+        return "doc"
+    lowered = stripped[:64].lower()
+    if lowered.startswith((b"<!doctype html", b"<html", b"<head", b"<body", b"<!--", b"<meta", b"<?xml")):
+        return "html"
+    ct = (content_type or "").lower()
+    if "html" in ct:
+        return "html"
+    if ct.startswith("text/"):
+        return "text"
+    return ""
+
+
+class _UrlProbe:
+    """
+    一次流式 GET 的分类结果：只读取开头若干字节做魔数嗅探，响应保持打开，
+    交给后续消费者（网页清洗 / 文档下载 / 可达性判断）继续使用，避免重复请求。
+    """
+
+    def __init__(self, url: str, response=None, prefix: bytes = b"", chunks=None):
+        self.url = url
+        self.response = response
+        self.prefix = prefix
+        self._chunks = chunks
+        self.consumed = False
+        self.closed = False
+
+        headers = response.headers if response is not None else {}
+        self.status = int(getattr(response, "status_code", 0) or 0)
+        self.content_type = (headers.get("content-type", "") or "") if headers else ""
+        self.content_disposition = (headers.get("content-disposition", "") or "") if headers else ""
+        self.kind = _sniff_kind(prefix, self.content_type) if response is not None else ""
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 400
+
+    @property
+    def readable(self) -> bool:
+        """响应体还可以接着读取（成功、未被消费、未关闭）。"""
+        return self.ok and not self.consumed and not self.closed
+
+    @property
+    def is_accessible_doc(self) -> bool:
+        """与 _filter_accessible_doc_urls 口径一致：2xx/3xx 且不是 HTML/纯文本；魔数确认是文档时以魔数为准。"""
+        if not self.ok:
+            return False
+        if self.kind in _DOC_KINDS:
+            return True
+        ct = self.content_type.lower()
+        return not (ct and ("text/html" in ct or "text/plain" in ct)) and self.kind not in ("html", "text")
+
+    def iter_content(self):
+        """依次产出已读取的开头字节与剩余响应体；只能消费一次。"""
+        if self.consumed or self.closed or self.response is None:
+            raise RuntimeError(f"响应已被消费或不可用: {self.url}")
+        self.consumed = True
+        if self.prefix:
+            yield self.prefix
+        for chunk in self._chunks:
+            if chunk:
+                yield chunk
+
+    def read_all(self) -> bytes:
+        return b"".join(self.iter_content())
+
+    def close(self) -> None:
+        self.closed = True
+        if self.response is not None:
+            try:
+                self.response.close()
+            except Exception:
+                pass
+
+
+def _classify_url(url: str, timeout: int = 15, headers: Optional[Dict[str, str]] = None) -> _UrlProbe:
+    """
+    单次流式 GET 分类 URL：取响应头与前几 KB，按 Content-Type + 魔数判断类型。
+    请求失败时返回 status=0 的空结果；调用方用完需 close()。
+    """
+    if not url:
+        return _UrlProbe(url)
+
+    headers = headers or {"User-Agent": "PolyMindBot/1.0"}
+    resp = None
+    try:
+        with get_host_scheduler().slot(url):
+            resp = http_client.get(url, timeout=timeout, allow_redirects=True, headers=headers, stream=True)
+        chunks = resp.iter_content(chunk_size=1024 * 64)
+        prefix = next(chunks, b"") if 200 <= int(resp.status_code or 0) < 400 else b""
+        probe = _UrlProbe(url, resp, prefix, chunks)
+    except Exception:
+        if resp is not None:
+            try:
+                resp.close()
+            except Exception:
+                pass
+        return _UrlProbe(url)
+
+    _remember_doc_verdict(probe)
+    return probe
+
+
+# URL -> 是否为可访问文档；同一轮搜索里分类、文档摘要、call_qwen_long 都会问到同一批 URL
+_DOC_VERDICTS = LRUCache(4096)
+_DOC_VERDICT_TTL = 3600
+
+
+def _remember_doc_verdict(probe: _UrlProbe) -> None:
+    """记录 URL 是否为可访问文档，后续 _filter_accessible_doc_urls 直接复用，不再重复探测。"""
+    if not probe.url or probe.response is None:
+        return
+    _DOC_VERDICTS.put(probe.url, probe.is_accessible_doc, time.time() + _DOC_VERDICT_TTL)
+
+
 def _filter_accessible_doc_urls(urls: List[str], timeout: int = 6) -> List[str]:
     """
-    仅做“可达性检查”，不读取内容：
-    - 优先 HEAD；若失败或返回 >=400 或 405，则用 GET(stream=True) 再试一次；
-    - 只保留 2xx/3xx；
+    仅做“可达性检查”：
+    - 已分类过的 URL 直接复用结论；
+    - 否则发一次流式 GET，只读开头字节嗅探类型后关闭；
+    - 只保留 2xx/3xx 且不是 HTML/纯文本伪装的文档；
     - 最多返回 10 个。
     """
     ok: List[str] = []
@@ -119,28 +274,15 @@ def _filter_accessible_doc_urls(urls: List[str], timeout: int = 6) -> List[str]:
         if len(ok) >= _MAX_DOC_URLS:
             break
 
-        try:
-            resp = requests.head(u, timeout=timeout, allow_redirects=True, headers=headers)
-            code = int(resp.status_code or 0)
-            content_type = (resp.headers.get("content-type", "") or "").lower()
-            resp.close()
-
-            # 有些站点不支持 HEAD，或者直接给 4xx；此时用 GET(stream=True) 再试
-            if code == 405 or code >= 400 or code == 0:
-                resp = requests.get(u, timeout=timeout, allow_redirects=True, headers=headers, stream=True)
-                code = int(resp.status_code or 0)
-                if not content_type:
-                    content_type = (resp.headers.get("content-type", "") or "").lower()
-                resp.close()
+        verdict = _DOC_VERDICTS.get(u)
+        if verdict is None:
+            probe = _classify_url(u, timeout=timeout, headers=headers)
+            probe.close()
+            # 失败就直接过滤掉，不记录也不返回
+            verdict = probe.is_accessible_doc
 
-            if 200 <= code < 400:
-                # 避免把“伪装成 .pdf 但实际返回 HTML/文本”的链接放进 doc_url
-                if content_type and ("text/html" in content_type or "text/plain" in content_type):
-                    continue
-                ok.append(u)
-        except Exception:
-            # 按你的要求：失败就直接过滤掉，不记录也不返回
-            continue
+        if verdict:
+            ok.append(u)
 
     return ok
 
@@ -172,36 +314,342 @@ def _safe_filename_from_url(url: str, fallback_ext: str = ".pdf") -> str:
     return name
 
 
-def _download_doc(url: str, timeout: int = 30) -> Path:
+class DocDownloadError(RuntimeError):
+    """文档下载被中止：超出大小/时间上限、内容不是文档或多次续传仍失败。"""
+
+
+_DOWNLOAD_CHUNK = 1024 * 256
+_CONTENT_RANGE_RE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)", re.I)
+
+
+def _expected_total_bytes(resp, offset: int) -> Optional[int]:
+    """从 Content-Range（206）或 Content-Length（200）得到完整文件大小；未知或经过压缩编码时返回 None。"""
+    if (resp.headers.get("content-encoding", "") or "identity").lower() != "identity":
+        return None
+    m = _CONTENT_RANGE_RE.match(resp.headers.get("content-range", "") or "")
+    if m and m.group(3) != "*":
+        return int(m.group(3))
+    try:
+        length = int(resp.headers.get("content-length", "") or -1)
+    except ValueError:
+        return None
+    if length < 0:
+        return None
+    return offset + length if resp.status_code == 206 else length
+
+
+def _resume_validator(headers) -> str:
+    """If-Range 只能用强 ETag 或 Last-Modified，保证续传的是同一个文件。"""
+    etag = (headers.get("etag", "") or "").strip()
+    if etag and not etag.startswith("W/"):
+        return etag
+    return (headers.get("last-modified", "") or "").strip()
+
+
+def _download_doc(
+    url: str, timeout: int = 30, probe: Optional[_UrlProbe] = None, hold: bool = False
+) -> Path:
     """
-    下载文档到 download 目录，返回本地文件路径。
-    说明：此处不再做可达性校验（上游已校验），只负责“下载落盘”。
+    流式下载文档到 download 目录，返回本地文件路径。
+    说明：此处不再做可达性校验（上游已校验），只负责“下载落盘”：
+    - 若传入分类阶段仍未消费的响应（probe），直接接着读取，不再重新请求；
+    - 开头字节不是 PDF/DOC/DOCX 魔数（如 HTML 错误页）时立即中止；
+    - Content-Length 或已下载字节超过 doc_max_bytes、总耗时超过 doc_download_max_seconds 时中止；
+    - 连接中断后用 Range + If-Range 从断点续传，最多 doc_download_resume_attempts 次；
+    - 先写入 .part 临时文件，完成后再原子改名，文件扩展名以魔数识别结果为准。
+    - 启用文档仓库（doc_store）时：URL 已下载过直接返回仓库内的文件；新下载的文件按 sha256 入库，
+      内容相同的镜像只保留一份；hold=True 时返回的路径已持有仓库引用，调用方用完需 release_path()。
+    失败抛 DocDownloadError（网络异常原样抛出）。
     """
-    download_dir = _ensure_download_dir()
-    fname = _safe_filename_from_url(url)
-    # 避免同名覆盖：若已存在则追加 uuid
-    dst = download_dir / fname
-    if dst.exists():
-        dst = download_dir / f"{dst.stem}_{uuid.uuid4().hex}{dst.suffix}"
+    store = get_doc_store()
+    if store is not None:
+        cached = store.lookup_url(url, hold=hold)
+        if cached is not None:
+            if probe is not None:
+                probe.close()
+            return cached
 
+    download_dir = _ensure_download_dir()
+    max_bytes = int(config.get("doc_max_bytes", 64 * 1024 * 1024) or 0)
+    max_seconds = float(config.get("doc_download_max_seconds", 180) or 0)
+    attempts = max(0, int(config.get("doc_download_resume_attempts", 3) or 0))
+    deadline = time.monotonic() + max_seconds if max_seconds > 0 else None
+
+    part = download_dir / f"{uuid.uuid4().hex}.part"
+    written = 0
+    head = b""
+    kind = ""
+    validator = ""
     headers = {"User-Agent": "Mozilla/5.0 (compatible; DocDownloader/1.0)"}
-    with requests.get(url, timeout=timeout, allow_redirects=True, headers=headers, stream=True) as r:
-        r.raise_for_status()
-        with open(dst, "wb") as f:
-            for chunk in r.iter_content(chunk_size=1024 * 256):
-                if chunk:
-                    f.write(chunk)
 
-    return dst
+    try:
+        for attempt in range(attempts + 1):
+            try:
+                # 新发起的请求在整个传输期间（含 Range 续传的各次尝试）一直占用该域名的名额，
+                # 避免正文下载绕过同站间隔与在途上限、对同一站点并发拉取大文件；
+                # 接着读取分类响应时不再占新名额，该请求在分类阶段已计过一次
+                reuse_probe = attempt == 0 and probe is not None and probe.readable
+                with nullcontext() if reuse_probe else get_host_scheduler().slot(url):
+                    if reuse_probe:
+                        resp = probe.response
+                        chunks = probe.iter_content()
+                    else:
+                        req_headers = dict(headers)
+                        if written and validator:
+                            req_headers["Range"] = f"bytes={written}-"
+                            req_headers["If-Range"] = validator
+                        resp = http_client.get(
+                            url, timeout=timeout, allow_redirects=True, headers=req_headers, stream=True
+                        )
+                        resp.raise_for_status()
+                        chunks = resp.iter_content(chunk_size=_DOWNLOAD_CHUNK)
+
+                    if resp.status_code != 206:
+                        # 首次请求，或服务端不支持/拒绝续传：从头开始
+                        written, head, kind = 0, b"", ""
+                    if not written:
+                        validator = _resume_validator(resp.headers)
+
+                    total = _expected_total_bytes(resp, written)
+                    if max_bytes and total is not None and total > max_bytes:
+                        raise DocDownloadError(f"文档过大（{total} 字节 > doc_max_bytes={max_bytes}）：{url}")
+
+                    with open(part, "ab" if written else "wb") as f:
+                        for chunk in chunks:
+                            if not chunk:
+                                continue
+                            if not kind:
+                                head += chunk
+                                if len(head) >= 16:
+                                    kind = _sniff_kind(head, resp.headers.get("content-type", ""))
+                                    if kind not in _DOC_KINDS:
+                                        raise DocDownloadError(f"内容不是 PDF/DOC/DOCX（识别为 {kind or '未知'}）：{url}")
+                            written += len(chunk)
+                            if max_bytes and written > max_bytes:
+                                raise DocDownloadError(f"文档超过 doc_max_bytes={max_bytes}：{url}")
+                            if deadline is not None and time.monotonic() > deadline:
+                                raise DocDownloadError(f"下载超过 doc_download_max_seconds={max_seconds:g}s：{url}")
+                            f.write(chunk)
+
+                    if not kind:
+                        kind = _sniff_kind(head, resp.headers.get("content-type", ""))
+                        if kind not in _DOC_KINDS:
+                            raise DocDownloadError(f"内容不是 PDF/DOC/DOCX：{url}")
+                    if total is not None and written < total:
+                        raise RequestException(f"连接提前结束（{written}/{total} 字节）")
+                    break
+            except RequestException:
+                if attempt >= attempts or (deadline is not None and time.monotonic() > deadline):
+                    raise
+                if not validator:
+                    written = 0
+            finally:
+                if attempt == 0 and probe is not None:
+                    probe.close()
+
+        if store is not None:
+            return store.ingest(part, url, kind, hold=hold)
+
+        fname = _safe_filename_from_url(url, fallback_ext=f".{kind}")
+        dst = download_dir / fname
+        if dst.suffix.lower() != f".{kind}":
+            dst = dst.with_suffix(f".{kind}")
+        # 避免同名覆盖：若已存在则追加 uuid
+        if dst.exists():
+            dst = download_dir / f"{dst.stem}_{uuid.uuid4().hex}{dst.suffix}"
+        os.replace(part, dst)
+        return dst
+    finally:
+        if part.exists():
+            try:
+                part.unlink()
+            except OSError:
+                pass
+
 
+def _pdf_table_mode() -> str:
+    mode = (config.get("pdf_table_mode") or "auto").lower()
+    return mode if mode in ("auto", "always", "never") else "auto"
 
-def _read_pdf_by_page(local_path: Path) -> str:
+
+def _page_may_have_table(page) -> bool:
+    """
+    廉价判断该页是否可能有表格：pdfplumber 默认的 lines 策略只用页面上的边（page.edges：
+    每条线段、每个矩形的 4 条边、曲线的各段）求交点围成单元格，
+    边数少于 pdf_table_min_edges（默认 4，一个单元格至少需要 4 条边）时不可能框出表格。
+    """
+    min_edges = int(config.get("pdf_table_min_edges", 4) or 0)
+    try:
+        edges = len(page.edges)
+    except Exception:
+        return True
+    return edges >= min_edges
+
+
+def _extract_pdf_page(page, page_no: int, table_mode: str = "auto") -> Dict[str, Any]:
+    """
+    抽取单页：全文 text、lines（逐行）、tables（若可抽取）、简单 meta。
+    先对每页做文本抽取；extract_tables 代价最高，auto 模式下只对线段/矩形足够多的页面执行，
+    其余页面 tables 为空列表（与未抽到表格时一致）。
+    """
+    try:
+        page_text = page.extract_text() or ""
+    except Exception:
+        page_text = ""
+
+    # 表格（若抽取失败则置空）
+    check_tables = table_mode == "always" or (table_mode == "auto" and _page_may_have_table(page))
+    tables: List[Any] = []
+    if check_tables:
+        try:
+            tables = page.extract_tables() or []
+        except Exception:
+            tables = []
+
+    raw_lines = [ln.rstrip("\n") for ln in (page_text.splitlines() if page_text else [])]
+    lines_clean = [ln.strip() for ln in raw_lines if ln.strip()]
+
+    heading_guesses: List[str] = []
+    for ln in lines_clean[:12]:
+        if re.match(r"^\d+(\.\d+)*\s+\S+", ln):
+            heading_guesses.append(ln)
+        elif len(ln) <= 120 and ln.isupper() and any(ch.isalpha() for ch in ln):
+            heading_guesses.append(ln)
+
+    return {
+        "page": page_no,
+        "text": page_text,
+        "lines": lines_clean,
+        "tables": tables,
+        "meta": {
+            "line_count": len(lines_clean),
+            "char_count": len(page_text),
+            "heading_guesses": heading_guesses[:5],
+            "tables_checked": check_tables,
+        },
+    }
+
+
+def _failed_pdf_page(page_no: int, reason: str) -> Dict[str, Any]:
+    """分片失败（超出内存上限、进程崩溃等）时的占位页，结构与正常页一致。"""
+    return {
+        "page": page_no,
+        "text": "",
+        "lines": [],
+        "tables": [],
+        "meta": {
+            "line_count": 0,
+            "char_count": 0,
+            "heading_guesses": [],
+            "tables_checked": False,
+            "error": reason,
+        },
+    }
+
+
+def _extract_pdf_range(
+    local_path: str, start: int, end: int, table_mode: str = "auto"
+) -> List[Dict[str, Any]]:
+    """抽取 [start, end) 页（从 0 开始）；在子进程中执行，各自独立打开文件。"""
+    pages: List[Dict[str, Any]] = []
+    with pdfplumber.open(local_path) as pdf:
+        for idx in range(start, end):
+            page = pdf.pages[idx]
+            pages.append(_extract_pdf_page(page, idx + 1, table_mode))
+            # 逐页释放 pdfplumber 缓存的对象，控制常驻内存
+            try:
+                page.flush_cache()
+            except Exception:
+                pass
+    return pages
+
+
+def _pdf_worker_init(max_memory_bytes: int) -> None:
+    """PDF 解析子进程初始化：用 RLIMIT_AS 限制地址空间，超限时该分片抛 MemoryError 而不是拖垮整机。"""
+    if max_memory_bytes <= 0 or resource is None:
+        return
+    try:
+        _soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+        limit = max_memory_bytes if hard == resource.RLIM_INFINITY else min(max_memory_bytes, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (ValueError, OSError):
+        pass
+
+
+_PDF_POOL: Optional[ProcessPoolExecutor] = None
+_PDF_POOL_LOCK = threading.Lock()
+
+
+def _pdf_extract_workers() -> int:
+    workers = int(config.get("pdf_extract_workers", 0) or 0)
+    if workers <= 0:
+        workers = max(1, (os.cpu_count() or 2) - 1)
+    return workers
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """PDF 解析进程池（进程内共用）；使用 spawn，避免在多线程进程中 fork。"""
+    global _PDF_POOL  # pylint: disable=global-statement
+    with _PDF_POOL_LOCK:
+        if _PDF_POOL is None:
+            max_mb = int(config.get("pdf_worker_max_memory_mb", 1024) or 0)
+            _PDF_POOL = ProcessPoolExecutor(
+                max_workers=_pdf_extract_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_pdf_worker_init,
+                initargs=(max_mb * 1024 * 1024,),
+            )
+    return _PDF_POOL
+
+
+def _reset_pdf_pool() -> None:
+    """子进程异常退出后进程池不可再用，丢弃以便下次重建。"""
+    global _PDF_POOL  # pylint: disable=global-statement
+    with _PDF_POOL_LOCK:
+        pool, _PDF_POOL = _PDF_POOL, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_pdf_pages_parallel(
+    local_path: Path, total: int, table_mode: str = "auto"
+) -> List[Dict[str, Any]]:
+    """按页区间分片交给进程池并行抽取，按页序合并；单个分片失败只影响该分片的页。"""
+    shard = max(1, int(config.get("pdf_shard_pages", 16) or 16))
+    ranges = [(start, min(start + shard, total)) for start in range(0, total, shard)]
+    pool = _get_pdf_pool()
+    futures = [
+        pool.submit(_extract_pdf_range, str(local_path), start, end, table_mode)
+        for start, end in ranges
+    ]
+
+    pages: List[Dict[str, Any]] = []
+    broken = False
+    for (start, end), fut in zip(ranges, futures):
+        try:
+            pages.extend(fut.result())
+        except BrokenProcessPool:
+            broken = True
+            pages.extend(_failed_pdf_page(i + 1, "worker crashed") for i in range(start, end))
+        except MemoryError:
+            pages.extend(_failed_pdf_page(i + 1, "memory limit exceeded") for i in range(start, end))
+        except Exception as e:
+            pages.extend(_failed_pdf_page(i + 1, f"{type(e).__name__}: {e}") for i in range(start, end))
+    if broken:
+        _reset_pdf_pool()
+    return pages
+
+
+def _read_pdf_by_page(local_path: Path, table_mode: Optional[str] = None) -> str:
     """
     使用 pdfplumber 逐页读取 PDF 文本，并生成“逐页结构化 JSON 字符串”。
 
     注意：
     - 不处理图片（按你的要求忽略图片类内容）。
     - 每页保留：全文 text、lines（逐行）、tables（若可抽取）、简单 meta。
+    - 表格抽取按 pdf_table_mode：auto（默认，只对有线框的页执行 extract_tables）/ always / never；
+    - 页数达到 pdf_parallel_min_pages 时按 pdf_shard_pages 分片交给多进程并行抽取，结果按页序合并，结构不变；
+      子进程地址空间受 pdf_worker_max_memory_mb 限制，超限的分片以空页（meta.error）占位。
     - 返回的是 JSON 字符串（ensure_ascii=False），便于直接喂给 qwen-long 总结。
     """
     data: Dict[str, Any] = {
@@ -211,45 +659,19 @@ def _read_pdf_by_page(local_path: Path) -> str:
         "pages": [],
     }
 
+    table_mode = table_mode or _pdf_table_mode()
     with pdfplumber.open(str(local_path)) as pdf:
         total = len(pdf.pages)
         data["page_count"] = total
 
-        for i, page in enumerate(pdf.pages, start=1):
-            try:
-                page_text = page.extract_text() or ""
-            except Exception:
-                page_text = ""
-
-            # 表格（若抽取失败则置空）
-            try:
-                tables = page.extract_tables() or []
-            except Exception:
-                tables = []
-
-            raw_lines = [ln.rstrip("\n") for ln in (page_text.splitlines() if page_text else [])]
-            lines_clean = [ln.strip() for ln in raw_lines if ln.strip()]
+        min_pages = int(config.get("pdf_parallel_min_pages", 24) or 0)
+        parallel = min_pages > 0 and total >= min_pages and _pdf_extract_workers() > 1
+        if not parallel:
+            for i, page in enumerate(pdf.pages, start=1):
+                data["pages"].append(_extract_pdf_page(page, i, table_mode))
 
-            heading_guesses: List[str] = []
-            for ln in lines_clean[:12]:
-                if re.match(r"^\d+(\.\d+)*\s+\S+", ln):
-                    heading_guesses.append(ln)
-                elif len(ln) <= 120 and ln.isupper() and any(ch.isalpha() for ch in ln):
-                    heading_guesses.append(ln)
-
-            data["pages"].append(
-                {
-                    "page": i,
-                    "text": page_text,
-                    "lines": lines_clean,
-                    "tables": tables,
-                    "meta": {
-                        "line_count": len(lines_clean),
-                        "char_count": len(page_text),
-                        "heading_guesses": heading_guesses[:5],
-                    },
-                }
-            )
+    if parallel:
+        data["pages"] = _extract_pdf_pages_parallel(local_path, total, table_mode)
 
     return json.dumps(data, ensure_ascii=False)
 
@@ -329,6 +751,30 @@ def _read_docx_by_block(docx_path: Path) -> str:
     return json.dumps(data, ensure_ascii=False)
 
 
+def _convert_doc_to_docx(doc_path: Path) -> Optional[Path]:
+    """
+    经 soffice 转换池把 .doc 转为 .docx，返回转换结果路径；未安装 LibreOffice 或转换失败返回 None。
+    仓库内的文档转换结果放在其派生目录，已转换过的直接复用。
+    """
+    store = get_doc_store()
+    digest = store.digest_of(doc_path) if store is not None else None
+    if digest:
+        dst = store.derived_dir(digest) / "converted.docx"
+    else:
+        dst = _ensure_download_dir() / (doc_path.stem + ".docx")
+    if dst.exists():
+        return dst
+
+    pool = get_soffice_pool()
+    if pool is None:
+        return None
+    try:
+        return pool.convert(doc_path, dst)
+    except Exception as e:
+        print(f"soffice 转换失败 {doc_path}：{e}")
+        return None
+
+
 def _read_doc_as_text(doc_path: Path) -> str:
     """
     读取 .doc（Word 97-2003）。优先使用 antiword / catdoc；
@@ -336,7 +782,6 @@ def _read_doc_as_text(doc_path: Path) -> str:
     """
     antiword = shutil.which("antiword")
     catdoc = shutil.which("catdoc")
-    soffice = shutil.which("soffice") or shutil.which("libreoffice")
 
     if antiword:
         p = subprocess.run([antiword, str(doc_path)], capture_output=True, text=True)
@@ -345,26 +790,19 @@ def _read_doc_as_text(doc_path: Path) -> str:
         p = subprocess.run([catdoc, str(doc_path)], capture_output=True, text=True)
         return (p.stdout or "")
 
-    if soffice:
-        out_dir = _ensure_download_dir()
-        subprocess.run(
-            [soffice, "--headless", "--convert-to", "docx", "--outdir", str(out_dir), str(doc_path)],
-            capture_output=True,
-            text=True,
-        )
-        cand = out_dir / (doc_path.stem + ".docx")
-        if cand.exists():
-            data = json.loads(_read_docx_by_block(cand))
-            texts: List[str] = []
-            for b in data.get("blocks", []):
-                t = (b.get("text") or "").strip()
-                if t:
-                    texts.append(t)
-                if b.get("type") == "table":
-                    for row in (b.get("rows") or []):
-                        row = row or []
-                        texts.append("\t".join([(c or "").strip() for c in row]))
-            return "\n".join(texts)
+    cand = _convert_doc_to_docx(doc_path)
+    if cand is not None:
+        data = json.loads(_read_docx_by_block(cand))
+        texts: List[str] = []
+        for b in data.get("blocks", []):
+            t = (b.get("text") or "").strip()
+            if t:
+                texts.append(t)
+            if b.get("type") == "table":
+                for row in (b.get("rows") or []):
+                    row = row or []
+                    texts.append("\t".join([(c or "").strip() for c in row]))
+        return "\n".join(texts)
 
     raise RuntimeError("无法解析 .doc：未找到 antiword/catdoc/soffice。请安装其中之一，或改为 .docx。")
 
@@ -372,24 +810,16 @@ def _read_doc_as_text(doc_path: Path) -> str:
 def _read_doc_by_block(doc_path: Path) -> str:
     """
     读取 .doc，生成结构化 JSON 字符串：
-    - 若可转换为 docx，则按 docx 结构化；
+    - 若可转换为 docx（soffice 转换池），则按 docx 结构化；
     - 否则按“段落块”结构化（纯文本解析）。
     """
-    out_dir = _ensure_download_dir()
-    soffice = shutil.which("soffice") or shutil.which("libreoffice")
-    if soffice:
-        subprocess.run(
-            [soffice, "--headless", "--convert-to", "docx", "--outdir", str(out_dir), str(doc_path)],
-            capture_output=True,
-            text=True,
-        )
-        cand = out_dir / (doc_path.stem + ".docx")
-        if cand.exists():
-            data = json.loads(_read_docx_by_block(cand))
-            data["file_type"] = "doc"
-            data["converted_to_docx"] = str(cand)
-            data["source_doc"] = str(doc_path)
-            return json.dumps(data, ensure_ascii=False)
+    cand = _convert_doc_to_docx(doc_path)
+    if cand is not None:
+        data = json.loads(_read_docx_by_block(cand))
+        data["file_type"] = "doc"
+        data["converted_to_docx"] = str(cand)
+        data["source_doc"] = str(doc_path)
+        return json.dumps(data, ensure_ascii=False)
 
     text = _read_doc_as_text(doc_path)
     paras = [p.strip() for p in re.split(r"\n\s*\n", text or "") if p.strip()]
@@ -411,6 +841,168 @@ def _read_doc_or_docx_by_block(path: Path) -> str:
         return _read_doc_by_block(path)
     raise RuntimeError(f"不支持的文档类型: {ext}")
 
+def _extract_doc_json_uncached(local_path: Path) -> Tuple[str, str]:
+    """按扩展名调用本地解析器，返回 (结构化 JSON 字符串, doc_type)。"""
+    ext = (local_path.suffix or "").lower()
+
+    if ext == ".pdf":
+        return _read_pdf_by_page(local_path), "pdf"  # 逐页
+    if ext in (".doc", ".docx"):
+        return _read_doc_or_docx_by_block(local_path), ext.lstrip(".")  # 按块
+
+    # 兜底：按纯文本封装为 JSON
+    try:
+        raw = local_path.read_text(encoding="utf-8", errors="ignore")
+    except Exception:
+        raw = ""
+    doc_json = json.dumps(
+        {
+            "file_type": ext.lstrip(".") or "unknown",
+            "local_path": str(local_path),
+            "text": raw,
+        },
+        ensure_ascii=False,
+    )
+    return doc_json, ext.lstrip(".") or "unknown"
+
+
+def _extraction_cache_path(local_path: Path) -> Optional[Path]:
+    """文档在仓库内时，解析结果按 digest + 解析器版本存放在其派生目录；否则不缓存。"""
+    store = get_doc_store()
+    digest = store.digest_of(local_path) if store is not None else None
+    if not digest:
+        return None
+    # 表格抽取模式会改变 PDF 的 tables 字段，按模式分开缓存
+    return store.derived_dir(digest) / f"extract-v{_EXTRACTOR_VERSION}-{_pdf_table_mode()}.jsonl"
+
+
+def _load_extraction(local_path: Path) -> Optional[LazyExtraction]:
+    """读取已缓存的解析结果（按页/块懒加载）；没有缓存返回 None。"""
+    cache_path = _extraction_cache_path(local_path)
+    cached = load_extraction(cache_path) if cache_path is not None else None
+    if cached is not None:
+        cached.header["local_path"] = str(local_path)
+    return cached
+
+
+def _has_failed_items(data: Dict[str, Any]) -> bool:
+    """是否含分片失败的占位页（meta.error）：一次性的崩溃/超内存不能写入缓存，否则该文档以后一直为空。"""
+    items = data.get("pages") or data.get("blocks") or []
+    return any((item.get("meta") or {}).get("error") for item in items if isinstance(item, dict))
+
+
+def _extract_doc(local_path: Path) -> Tuple[Union[LazyExtraction, InMemoryExtraction], str]:
+    """
+    带缓存的本地解析，返回 (解析结果, doc_type)：同一文档（按内容 digest）重复提问时直接打开已保存的
+    逐页/逐块结果，跳过 pdfplumber 等解析，页/块内容在用到时才从磁盘读取。
+    解析器输出结构变化时提升 _EXTRACTOR_VERSION，旧缓存自动失效。
+    有页面解析失败（分片崩溃、超出内存上限）时本次结果照常返回但不缓存，下次提问重新解析。
+    """
+    doc_type = (local_path.suffix or "").lower().lstrip(".") or "unknown"
+    cached = _load_extraction(local_path)
+    if cached is not None:
+        return cached, doc_type
+
+    doc_json, doc_type = _extract_doc_json_uncached(local_path)
+    data = json.loads(doc_json)
+    cache_path = _extraction_cache_path(local_path)
+    if cache_path is not None and doc_type in _DOC_KINDS and not _has_failed_items(data):
+        try:
+            save_extraction(cache_path, data)
+        except Exception as e:
+            print(f"解析结果缓存写入失败 {local_path}：{e}")
+    return InMemoryExtraction(data), doc_type
+
+
+_TOC_LINE_RE = re.compile(r"(?:\.{3,}|…{2,}|·{3,}|-{3,}|\s{2,})\s*\d{1,4}\s*$")
+
+
+def _is_toc_page(page: Dict[str, Any]) -> bool:
+    """目录页：开头有“目录/目次/Contents”，或多数行以“……页码”结尾。"""
+    lines = page.get("lines") or []
+    head = "".join(lines[:3]).replace(" ", "").replace("\u3000", "")
+    if "目录" in head or "目次" in head or head.lower().startswith("contents"):
+        return True
+    hits = sum(1 for ln in lines if _TOC_LINE_RE.search(ln))
+    return len(lines) >= 5 and hits >= len(lines) * 0.5
+
+
+def _compact_pdf_page(page: Dict[str, Any]) -> Dict[str, Any]:
+    """送给模型的精简页：lines 与 text 内容重复，只保留 text；有表格/标题时才带上。"""
+    item: Dict[str, Any] = {"page": page.get("page"), "text": page.get("text") or ""}
+    if page.get("tables"):
+        item["tables"] = page["tables"]
+    headings = (page.get("meta") or {}).get("heading_guesses") or []
+    if headings:
+        item["headings"] = headings
+    return item
+
+
+def _doc_summary_strategy() -> str:
+    strategy = (config.get("doc_summary_strategy") or "select").lower()
+    return strategy if strategy in ("full", "select", "mapreduce") else "select"
+
+
+def _doc_json_for_summary(
+    search_question: str, extraction: Union[LazyExtraction, InMemoryExtraction], doc_type: str
+) -> str:
+    """
+    生成送给 qwen-long 的文档 JSON：
+    - full：原样送出全部解析结果；
+    - select（默认）/ mapreduce：PDF 每页只保留 text/tables/headings；select 下总量超过 doc_summary_token_budget 时，
+      用标题 + 正文的字 n-gram TF-IDF 挑出与 search_question 最相关的页，并优先带上目录页，
+      在 selection 字段中注明入选页码，页内仍保留 page 号便于按 Page N 标注来源。
+    挑选时逐页流式读取，只保留打分所需的正文与标题，入选页再按页号单独读取，不整份载入解析结果。
+    DOC/DOCX 的块本身已很紧凑，原样送出。
+    """
+    strategy = _doc_summary_strategy()
+    if strategy == "full" or doc_type != "pdf" or extraction.items_key != "pages" or not len(extraction):
+        return extraction.to_json()
+
+    compact = dict(extraction.header)
+
+    budget = int(config.get("doc_summary_token_budget", 24000) or 0)
+    if strategy == "mapreduce":
+        budget = 0
+    if budget <= 0:
+        compact["pages"] = [_compact_pdf_page(p) for p in extraction.items()]
+        return json.dumps(compact, ensure_ascii=False)
+
+    scan = int(config.get("doc_toc_scan_pages", 15) or 0)
+    texts: List[str] = []
+    headings: List[str] = []
+    costs: List[int] = []
+    toc: List[int] = []
+    for i, raw_page in enumerate(extraction.items()):
+        page = _compact_pdf_page(raw_page)
+        texts.append(page["text"])
+        headings.append("\n".join(page.get("headings") or []))
+        costs.append(estimate_tokens(json.dumps(page, ensure_ascii=False)))
+        if i < scan and _is_toc_page(raw_page):
+            toc.append(i)
+
+    if sum(costs) <= budget:
+        compact["pages"] = [_compact_pdf_page(p) for p in extraction.items()]
+        return json.dumps(compact, ensure_ascii=False)
+
+    chosen = select_pages(
+        search_question,
+        texts=texts,
+        headings=headings,
+        costs=costs,
+        budget_tokens=budget,
+        always=toc,
+    )
+    compact["pages"] = [_compact_pdf_page(p) for p in extraction.items(chosen)]
+    page_no = {i: p["page"] for i, p in zip(chosen, compact["pages"])}
+    compact["selection"] = {
+        "selected_pages": [page_no[i] for i in chosen],
+        "toc_pages": [page_no[i] for i in toc if i in page_no],
+        "note": "文档较长，仅包含与问题最相关的页及目录页；其余页未提供。",
+    }
+    return json.dumps(compact, ensure_ascii=False)
+
+
 def _qwen_long_summarize_doc_from_json(
     api_key: str,
     search_question: str,
@@ -442,11 +1034,13 @@ def _qwen_long_summarize_doc_from_json(
 
 # 强制输出规范（必须遵守）
 1) 必须覆盖文档的：背景/目的、核心概念定义、整体结构、关键流程/接口/参数、约束与注意事项、示例或结论（若文档包含）。
-2) 必须“可追溯”：每条关键结论都要标注来源位置：
+2) 必须“可追溯”：每条关键结论都要标注来源位置（若 JSON 含 window 字段，说明只是文档的一段，只总结该段）：
    - PDF：标注 Page N（对应 JSON.pages[].page）
    - DOC/DOCX：标注 Block #K（对应 JSON.blocks[].index，表格也算 Block）
 3) 禁止编造：JSON 里没有的内容不要补；遇到缺失就明确说明“未在文档中找到”。
 4) 需要非常细致：优先按章节/主题展开，逐点罗列；尽量把每章关键点都覆盖。
+5) 若 JSON 含 selection 字段，说明文档较长、只提供了与问题最相关的页（及目录页）：只总结已提供的页，
+   未提供的页不得臆测，可结合目录说明其余章节未展开。
 
 # 输入（结构化 JSON）
 ```json
@@ -467,6 +1061,142 @@ def _qwen_long_summarize_doc_from_json(
     )
     return content or ""
 
+def _split_doc_windows(data: Dict[str, Any], window_tokens: int) -> List[Dict[str, Any]]:
+    """
+    把文档 JSON 的 pages/blocks 按 token 上限切成连续窗口，每个窗口保留头信息并在 window 字段注明范围；
+    单页/单块超过上限时独占一个窗口。
+    """
+    items_key = "pages" if "pages" in data else "blocks"
+    items = data.get(items_key) or []
+    header = {k: v for k, v in data.items() if k != items_key}
+
+    groups: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    used = 0
+    for item in items:
+        cost = estimate_tokens(json.dumps(item, ensure_ascii=False))
+        if current and used + cost > window_tokens:
+            groups.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += cost
+    if current:
+        groups.append(current)
+
+    label, field = ("Page ", "page") if items_key == "pages" else ("Block #", "index")
+    windows: List[Dict[str, Any]] = []
+    for idx, group in enumerate(groups, start=1):
+        window = dict(header)
+        window[items_key] = group
+        window["window"] = {
+            "index": idx,
+            "total": len(groups),
+            "range": f"{label}{group[0].get(field)}-{group[-1].get(field)}",
+        }
+        windows.append(window)
+    return windows
+
+
+def _qwen_long_reduce_summaries(
+    api_key: str,
+    search_question: str,
+    requirement: str,
+    doc_url: str,
+    doc_type: str,
+    partials: List[Tuple[str, str]],
+) -> str:
+    """把各窗口的分段总结合并为一份完整总结，保留原有的 Page/Block 来源标注。"""
+    sections = "\n\n".join(f"## 分段 {rng}\n{text}" for rng, text in partials)
+    prompt = f"""# 任务
+下面是同一份文档按页/块顺序分段后，逐段得到的细致总结（每段已按 Page N / Block #K 标注来源）。
+请把它们合并为一份完整、细致的文档总结。
+
+# 文档信息
+- doc_url: {doc_url}
+- doc_type: {doc_type}
+
+# 关联问题（用于理解侧重点，但不得为迎合问题而遗漏文档内容）
+- search_question:
+{search_question}
+
+# 总结要求
+{requirement}
+
+# 合并规范（必须遵守）
+1) 按文档整体结构（背景/目的、核心概念、结构、关键流程/参数、约束、结论）重新组织，跨段重复的内容合并；
+2) 必须保留每条关键结论原有的来源标注（Page N / Block #K），不得丢失或改写页码；
+3) 禁止编造：分段总结里没有的内容不要补；
+4) 不得因合并而省略细节，数据、定义、条件、适用范围等必须完整保留。
+
+# 分段总结
+{sections}
+"""
+    messages = [
+        {"role": "system", "content": "你是一个严谨的技术文档分析助手。"},
+        {"role": "user", "content": prompt},
+    ]
+    content, _ = _dashscope_call_message(
+        api_key=api_key,
+        model="qwen-long",
+        messages=messages,
+        tools=None,
+        temperature=0.2,
+    )
+    return content or ""
+
+
+def _qwen_long_mapreduce_summarize(
+    api_key: str,
+    search_question: str,
+    requirement: str,
+    doc_url: str,
+    local_path: Path,
+    doc_json: str,
+    doc_type: str,
+) -> str:
+    """
+    map-reduce 总结：按 doc_window_tokens 切成连续窗口，最多 doc_map_concurrency 个并发调用 qwen-long
+    分别总结（沿用单文档总结的提示词，来源标注不变），再用一次调用合并。只有一个窗口时直接返回其总结。
+    """
+    window_tokens = max(1000, int(config.get("doc_window_tokens", 12000) or 12000))
+    windows = _split_doc_windows(json.loads(doc_json), window_tokens)
+    if len(windows) <= 1:
+        return _qwen_long_summarize_doc_from_json(
+            api_key=api_key,
+            search_question=search_question,
+            requirement=requirement,
+            doc_url=doc_url,
+            local_path=local_path,
+            doc_json=doc_json,
+            doc_type=doc_type,
+        )
+
+    def _map(window: Dict[str, Any]) -> str:
+        return _qwen_long_summarize_doc_from_json(
+            api_key=api_key,
+            search_question=search_question,
+            requirement=requirement,
+            doc_url=doc_url,
+            local_path=local_path,
+            doc_json=json.dumps(window, ensure_ascii=False),
+            doc_type=doc_type,
+        )
+
+    workers = max(1, int(config.get("doc_map_concurrency", 4) or 4))
+    with ThreadPoolExecutor(max_workers=min(workers, len(windows)), thread_name_prefix="doc-map") as pool:
+        partial_texts = list(pool.map(_map, windows))
+
+    partials = [(w["window"]["range"], text) for w, text in zip(windows, partial_texts)]
+    return _qwen_long_reduce_summaries(
+        api_key=api_key,
+        search_question=search_question,
+        requirement=requirement,
+        doc_url=doc_url,
+        doc_type=doc_type,
+        partials=partials,
+    )
+
+
 def _qwen_doc_turbo_analyze_doc_url_only(
     api_key: str,
     search_question: str,
@@ -533,12 +1263,29 @@ def _dashscope_call_message(
         kwargs["tools"] = tools
         kwargs["tool_choice"] = "auto"
 
-    resp = dashscope.Generation.call(**kwargs)
+    cache_key = llm_cache.make_key("message", {k: v for k, v in kwargs.items() if k != "api_key"})
+    cached = llm_cache.lookup(cache_key)
+    if cached is not None:
+        return cached["content"], cached["tool_calls"]
+
+    # 与 QwenModel 共用按 模型 + Key 的 RPM/TPM 限流与进程内在途上限
+    governor = get_governor(model, api_key)
+    ticket = governor.acquire(estimate_message_tokens(messages))
+    total_tokens = None
+    try:
+        with llm_slot():
+            resp = dashscope.Generation.call(**kwargs)
+        usage = _safe_get(resp, "usage", None)
+        total_tokens = _safe_get(usage, "total_tokens", None) if usage is not None else None
+    finally:
+        governor.commit(ticket, total_tokens)
 
     status_code = _safe_get(resp, "status_code", 200)
     if status_code and int(status_code) != 200:
         code = _safe_get(resp, "code", "")
         message = _safe_get(resp, "message", "")
+        if int(status_code) == 429:
+            governor.pause(float(config.get("rate_limit_pause_seconds", 10) or 0))
         raise RuntimeError(f"DashScope 调用失败: status_code={status_code}, code={code}, message={message}")
 
     output = _safe_get(resp, "output", {}) or {}
@@ -550,6 +1297,7 @@ def _dashscope_call_message(
     msg = _safe_get(choice0, "message", None) or _safe_get(choice0, "delta", None) or {}
     content = _safe_get(msg, "content", "") or ""
     tool_calls = _safe_get(msg, "tool_calls", None)
+    llm_cache.store(cache_key, {"content": content, "tool_calls": tool_calls})
     return content, tool_calls
 
 
@@ -608,40 +1356,35 @@ def _qwen_doc_turbo_analyze(
                     raise
 
             # 400 回退路径：下载 -> 本地解析(生成结构化JSON) -> qwen-long 细致总结
-            local_path = _download_doc(u)
-            ext = (local_path.suffix or "").lower()
-
-            if ext == ".pdf":
-                doc_json = _read_pdf_by_page(local_path)  # 返回 JSON 字符串（逐页）
-                doc_type = "pdf"
-            elif ext in (".doc", ".docx"):
-                doc_json = _read_doc_or_docx_by_block(local_path)  # 返回 JSON 字符串（按块）
-                doc_type = ext.lstrip(".")
-            else:
-                # 兜底：按纯文本封装为 JSON
-                try:
-                    raw = local_path.read_text(encoding="utf-8", errors="ignore")
-                except Exception:
-                    raw = ""
-                doc_json = json.dumps(
-                    {
-                        "file_type": ext.lstrip(".") or "unknown",
-                        "local_path": str(local_path),
-                        "text": raw,
-                    },
-                    ensure_ascii=False,
+            store = get_doc_store()
+            try:
+                # 返回时已持有仓库引用，直到解析与总结结束，期间文件不会被容量淘汰
+                local_path = _download_doc(u, hold=store is not None)
+            except DocDownloadError as e3:
+                # 过大/非文档等直接跳过该文档，不拖住整次搜索
+                print(f"跳过文档 {u}：{e3}")
+                continue
+            try:
+                extraction, doc_type = _extract_doc(local_path)
+                doc_json = _doc_json_for_summary(search_question, extraction, doc_type)
+
+                summarize = (
+                    _qwen_long_mapreduce_summarize
+                    if _doc_summary_strategy() == "mapreduce"
+                    else _qwen_long_summarize_doc_from_json
                 )
-                doc_type = ext.lstrip(".") or "unknown"
-
-            analyzed = _qwen_long_summarize_doc_from_json(
-                api_key=api_key,
-                search_question=search_question,
-                requirement=requirement,
-                doc_url=u,
-                local_path=local_path,
-                doc_json=doc_json,
-                doc_type=doc_type,
-            )
+                analyzed = summarize(
+                    api_key=api_key,
+                    search_question=search_question,
+                    requirement=requirement,
+                    doc_url=u,
+                    local_path=local_path,
+                    doc_json=doc_json,
+                    doc_type=doc_type,
+                )
+            finally:
+                if store is not None:
+                    store.release_path(local_path)
             out_parts.append(f"【文档】{u}\n{analyzed}")
 
         return "\n\n".join(out_parts).strip()
@@ -662,11 +1405,12 @@ def call_qwen_long(search_question: str, result_content: str) -> str:
     # 2) requests 仅做可达性检查，过滤不可访问 URL，最多 10 个
     doc_ok_urls = _filter_accessible_doc_urls(doc_candidates)
 
-    # 3) 生成 GUID -> URL 映射（一个 URL 一个 GUID）
+    # 3) 生成 ID -> URL 映射（一个 URL 一个 ID）
+    #    ID 由 URL 摘要得出：同一文档每次运行 ID 相同，请求字节不变才能命中 LLM 缓存
     doc_links: List[Dict[str, str]] = []
     doc_id_to_url: Dict[str, str] = {}
     for u in doc_ok_urls[:_MAX_DOC_URLS]:
-        doc_id = uuid.uuid4().hex  # GUID（不含连字符）
+        doc_id = hashlib.sha256(u.encode("utf-8")).hexdigest()[:32]
         doc_links.append({"id": doc_id, "url": u})
         doc_id_to_url[doc_id] = u
 
@@ -712,12 +1456,12 @@ def call_qwen_long(search_question: str, result_content: str) -> str:
             2. result_content 网络资料 JSON数组格式，一个元素是一个网页搜索结果，以下元素内部字段请牢记。
                a.search_question 搜索的问题
 
-               b.result_content 搜索的网页HTML(已清洗，保留了主要内容)，字段说明如下：
+               b.result_content 搜索的网页内容(已清洗，保留了主要内容，默认为紧凑的 Markdown 文本)，字段说明如下：
                   - title 网页标题 可用作来源。
                   - publish_time 发布时间/编辑时间。 （特别标注：文章发布时间定义；必须从此处获得，绝对禁止虚构）
                   - source  来源/作者/机构（可能为空）。（特别标注：来源的定义；必须从此处获得，绝对禁止虚构）
                   - snippet 摘要 网页，通常取用内容优先级低于web_content。
-                  - web_content 网页内容 通常为HTML格式，若web_content没有有价值的内容，可采用snippet。
+                  - web_content 网页内容 通常为 Markdown 文本（保留标题、表格与文档链接）或清洗后的 HTML，若web_content没有有价值的内容，可采用snippet。
                   - url 网页链接 若source没来源，可用此链接的域名作为来源。
 
                3) doc_links: array
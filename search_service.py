@@ -1,25 +1,42 @@
 # -*- coding: utf-8 -*-
 import json
 import re
+import threading
 import time
+import unicodedata
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from html import unescape
-from typing import Dict, List, Optional, Tuple
-from urllib.parse import urlparse, unquote
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlencode, urlparse, urlsplit, urlunsplit
 from search_anylyze import (
     call_qwen_long,
+    _DOC_KINDS,
+    _UrlProbe,
+    _classify_url,
     _filter_accessible_doc_urls,
     _qwen_doc_turbo_analyze,
 )
 
-import requests
+from requests.compat import chardet
 
+from cache_store import LRUCache, TieredCache
 from config import ConfigHelper
+import http_client
+from host_scheduler import HostScheduler, get_host_scheduler
+from relevance import pack_pages
 
 try:
-    from bs4 import BeautifulSoup,Comment
+    from bs4 import BeautifulSoup, CData, Comment, NavigableString, Tag
 except Exception:  # pragma: no cover - optional dependency
     BeautifulSoup = None
 
+# 默认 html.parser：与旧实现（_extract_body_html + _clean_body_html）输出一致；
+# lxml 更快，但会按自己的规则重排不规范的嵌套，输出与旧实现不同，需通过 html_parser 显式开启
+_HTML_PARSER = "html.parser"
+
 try:
     from playwright.sync_api import sync_playwright
 except Exception:  # pragma: no cover - optional dependency
@@ -39,8 +56,38 @@ RECENCY_HINT = {
     "year": "最近365天",
 }
 
-_PLAYWRIGHT = None
-_BROWSER = None
+# sync_playwright 的对象只能在创建它的线程里使用，抓取线程池中每个线程各持一个渲染器
+_PLAYWRIGHT_LOCAL = threading.local()
+# 渲染时直接拦截的统计/广告域名
+_TRACKER_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "hm.baidu.com", "cnzz.com", "51.la", "umeng.com", "growingio.com", "mmstat.com",
+)
+
+# 搜索结果缓存的默认有效期（秒），时效越强的筛选过期越快
+_SEARCH_CACHE_TTL = {
+    "week": 6 * 3600,
+    "month": 24 * 3600,
+    "semiyear": 3 * 24 * 3600,
+    "year": 7 * 24 * 3600,
+    "none": 30 * 24 * 3600,
+}
+
+# adaptive 渲染模式下按域名记住的结论："static" 直接 requests，"render" 直接 Playwright
+_RENDER_DECISIONS = LRUCache(2048)
+_RENDER_DECISION_TTL = 6 * 3600
+
+_CONTENT_CACHE: Optional[TieredCache] = None
+_CONTENT_CACHE_LOCK = threading.Lock()
+_CONTENT_CACHE_STATS: Dict[str, float] = {
+    "hits": 0,
+    "revalidated": 0,
+    "misses": 0,
+    "saved_seconds": 0.0,
+}
+
+_FETCH_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_FETCH_EXECUTOR_LOCK = threading.Lock()
 
 
 class SearchProviderError(RuntimeError):
@@ -54,12 +101,25 @@ class SearchProviderBase:
 
     def __init__(self, cfg: ConfigHelper):
         self.cfg = cfg
-        self._cache: Dict[str, Tuple[str, List[Dict]]] = {}
+        # 内存 LRU + SQLite 两级缓存；search_cache_path 置空则只用内存
+        self._cache = TieredCache(
+            namespace=f"search:{self.NAME}",
+            path=cfg.get("search_cache_path", "cache/polymind_cache.sqlite3"),
+            memory_size=int(cfg.get("search_cache_memory_size", 256) or 256),
+        )
+        self.cache_ttl: Dict[str, int] = dict(_SEARCH_CACHE_TTL)
+        self.cache_ttl.update(cfg.get("search_cache_ttl") or {})
         self.cooldown = float(cfg.get("search_cooldown", 1.0) or 1.0)
         self.retry_delay = int(cfg.get("search_retry_delay", 30) or 30)
 
+    @staticmethod
+    def _normalize_question(question: str) -> str:
+        """全半角统一、空白折叠、小写化，使仅有格式差异的同一问题命中同一缓存。"""
+        text = unicodedata.normalize("NFKC", question or "")
+        return re.sub(r"\s+", " ", text).strip().lower()
+
     def _cache_key(self, question: str, time_filter: str) -> str:
-        return f"{question.strip()}|||{time_filter or 'none'}"
+        return f"{self._normalize_question(question)}|||{time_filter or 'none'}"
 
     def _from_cache(self, question: str, time_filter: str):
         key = self._cache_key(question, time_filter)
@@ -67,7 +127,14 @@ class SearchProviderBase:
 
     def _store_cache(self, question: str, time_filter: str, data):
         key = self._cache_key(question, time_filter)
-        self._cache[key] = data
+        ttl = self.cache_ttl.get(time_filter or "none", self.cache_ttl.get("none"))
+        self._cache.put(key, data, ttl=ttl)
+
+    def _scheduled_search(self, question: str, time_filter: str):
+        """经按域名调度器发起检索：cooldown 作为对同一接口的最小请求间隔。"""
+        endpoint = getattr(self, "url", "") or ""
+        with get_host_scheduler().slot(endpoint, min_interval=self.cooldown):
+            return self._search(question, time_filter)
 
     def search(self, question: str, time_filter: str = "none"):
         """统一的外部调用入口，带缓存与简单退避。"""
@@ -76,16 +143,14 @@ class SearchProviderBase:
             return cached
 
         try:
-            result = self._search(question, time_filter)
+            result = self._scheduled_search(question, time_filter)
         except SearchProviderError:
             raise
         except Exception:  # pylint: disable=broad-except
             time.sleep(self.retry_delay)
-            result = self._search(question, time_filter)
+            result = self._scheduled_search(question, time_filter)
 
         self._store_cache(question, time_filter, result)
-        if self.cooldown:
-            time.sleep(self.cooldown)
         return result
 
     def _search(self, question: str, time_filter: str):
@@ -157,7 +222,7 @@ class BaiduAISearchProvider(SearchProviderBase):
             "Content-Type": "application/json",
         }
 
-        response = requests.post(
+        response = http_client.post(
             self.url,
             headers=headers,
             json=body,
@@ -261,54 +326,6 @@ def _is_doc_content_type(content_type: str) -> bool:
     )
 
 
-def _probe_content_type(url: str, timeout: int = 15) -> Tuple[bool, str, str]:
-    """
-    HEAD 优先尝试，若失败/405/4xx 再用 GET(stream=True) 取头，
-    返回 (ok, content_type, content_disposition)，只用于决策，不读取内容。
-    """
-    if not url:
-        return False, "", ""
-
-    headers = {"User-Agent": "PolyMindBot/1.0"}
-
-    def _req(method: str):
-        return requests.request(
-            method,
-            url,
-            timeout=timeout,
-            allow_redirects=True,
-            headers=headers,
-            stream=True,
-        )
-
-    resp = None
-    try:
-        resp = _req("HEAD")
-        code = int(resp.status_code or 0)
-        content_type = resp.headers.get("content-type", "")
-        content_disposition = resp.headers.get("content-disposition", "")
-        resp.close()
-
-        if code == 405 or code >= 400 or code == 0:
-            resp = _req("GET")
-            code = int(resp.status_code or 0)
-            if not content_type:
-                content_type = resp.headers.get("content-type", "")
-            if not content_disposition:
-                content_disposition = resp.headers.get("content-disposition", "")
-            resp.close()
-
-        ok = 200 <= code < 400
-        return ok, content_type, content_disposition
-    except Exception:
-        if resp is not None:
-            try:
-                resp.close()
-            except Exception:
-                pass
-        return False, "", ""
-
-
 def _should_use_doc_parser(url: str, content_type: str, content_disposition: str = "") -> bool:
     """
     判断是否走文档解析：
@@ -333,19 +350,27 @@ def _should_use_doc_parser(url: str, content_type: str, content_disposition: str
     return False
 
 
-def _summarize_document(search_question: str, url: str) -> str:
+def _summarize_document(search_question: str, url: str, probe: Optional[_UrlProbe] = None) -> str:
     """
     对文档类链接使用文档解析逻辑生成描述文本。
+    probe 为分类阶段的响应：直接据此判断可达性，不再重复探测；远程文档解析可能耗时数分钟，
+    调用前先关闭该响应，避免未读的 keep-alive 连接长时间占用并被服务端/代理超时断开。
     失败时返回空字符串，不阻断整体搜索流程。
     """
     api_key = (config.get("qwen_key") or "").strip()
     if not api_key or not url:
         return ""
 
-    accessible = _filter_accessible_doc_urls([url])
+    if probe is not None:
+        accessible = [url] if probe.is_accessible_doc else []
+    else:
+        accessible = _filter_accessible_doc_urls([url])
     if not accessible:
         return ""
 
+    if probe is not None:
+        probe.close()
+
     try:
         return _qwen_doc_turbo_analyze(
             api_key=api_key,
@@ -360,6 +385,42 @@ def _summarize_document(search_question: str, url: str) -> str:
 _PROVIDER = None
 
 
+def _get_fetch_executor() -> ThreadPoolExecutor:
+    """获取网页抓取线程池（进程内共用），并发度由 search_fetch_concurrency 控制。"""
+    global _FETCH_EXECUTOR  # pylint: disable=global-statement
+    with _FETCH_EXECUTOR_LOCK:
+        if _FETCH_EXECUTOR is None:
+            workers = max(1, int(config.get("search_fetch_concurrency", 4) or 4))
+            _FETCH_EXECUTOR = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="search-fetch"
+            )
+    return _FETCH_EXECUTOR
+
+
+def _fetch_ref_content(search_message: str, url: str, fetch_timeout: int) -> str:
+    """单条结果的抓取流程：一次流式 GET 分类 -> 文档解析或网页抓取清洗，在抓取线程池中执行。
+
+    分类得到的响应直接交给后续环节继续读取，不再单独 HEAD/GET 探测；
+    同一站点的节流由各请求函数内的 host_scheduler 负责，这里不再固定休眠。
+    """
+    probe = _classify_url(url, timeout=fetch_timeout)
+    try:
+        if probe.kind in _DOC_KINDS:
+            is_doc = True
+        elif probe.kind in ("html", "text"):
+            is_doc = False
+        else:
+            is_doc = _should_use_doc_parser(url, probe.content_type, probe.content_disposition)
+
+        if is_doc:
+            web_content = _summarize_document(search_message, url, probe=probe)
+            if web_content:
+                return web_content
+        return _fetch_url_content(url, timeout=fetch_timeout, probe=probe)
+    finally:
+        probe.close()
+
+
 def web_search(search_message: str, search_recency_filter: str = "none"):
     """统一对外暴露的搜索函数。"""
     global _PROVIDER  # pylint: disable=global-statement
@@ -378,38 +439,34 @@ def web_search(search_message: str, search_recency_filter: str = "none"):
     top_refs = sorted_refs[:10]
 
     fetch_timeout = int(config.get("search_fetch_timeout", 20) or 20)
-    results: List[Dict] = []
     seen_urls = set()
-    doc_summary_cache: Dict[str, str] = {}
 
     url_list = []
+    unique_refs: List[Dict] = []
     for ref in top_refs:
         url = ref.get("url") or ""
         url_list.append(url)
         if url in seen_urls:
             continue
         seen_urls.add(url)
-        time.sleep(3)
-        _ok_ct, content_type, content_disposition = _probe_content_type(
-            url, timeout=fetch_timeout
-        )
-        is_doc = _should_use_doc_parser(url, content_type, content_disposition)
+        unique_refs.append(ref)
 
-        web_content = ""
-        if is_doc:
-            if url not in doc_summary_cache:
-                doc_summary_cache[url] = _summarize_document(search_message, url)
-            web_content = doc_summary_cache.get(url, "")
-            if not web_content:
-                web_content = _fetch_url_content(url, timeout=fetch_timeout)
-        else:
-            web_content = _fetch_url_content(url, timeout=fetch_timeout)
+    # 并发抓取，按提交顺序取回结果，保持 authority/rerank 排序
+    executor = _get_fetch_executor()
+    futures = [
+        executor.submit(_fetch_ref_content, search_message, ref.get("url") or "", fetch_timeout)
+        for ref in unique_refs
+    ]
+
+    results: List[Dict] = []
+    for ref, future in zip(unique_refs, futures):
+        web_content = future.result()
         results.append(
             {
                 "title": ref.get("title"),
                 "snippet": ref.get("snippet"),
                 "publish_time": ref.get("publish_time"),
-                "url": url,
+                "url": ref.get("url") or "",
                 "source": ref.get("source"),
                 "authority_score": ref.get("authority_score"),
                 "rerank_score": ref.get("rerank_score"),
@@ -417,23 +474,22 @@ def web_search(search_message: str, search_recency_filter: str = "none"):
             }
         )
 
-
-
     # 取 title/publish_time/source/web_content/url 字段组成 JSON 字符串，供大模型整合并保留来源和时间
-    result_content = json.dumps(
-        [
-            {
-                "title": item.get("title"),
-                "publish_time": item.get("publish_time"),
-                "source": item.get("source"),
-                "snippet": item.get("snippet"),
-                "web_content": item.get("web_content"),
-                "url": item.get("url"),
-            }
-            for item in results
-        ],
-        ensure_ascii=False,
-    )
+    pages = [
+        {
+            "title": item.get("title"),
+            "publish_time": item.get("publish_time"),
+            "source": item.get("source"),
+            "snippet": item.get("snippet"),
+            "web_content": item.get("web_content"),
+            "url": item.get("url"),
+        }
+        for item in results
+    ]
+    # 按 token 预算挑选与问题最相关的正文段落，避免 qwen-long 请求过大
+    budget = int(config.get("search_context_token_budget", 24000) or 0)
+    pages = pack_pages(search_message, pages, budget)
+    result_content = json.dumps(pages, ensure_ascii=False)
     
     result = ""
     try:
@@ -446,104 +502,391 @@ def web_search(search_message: str, search_recency_filter: str = "none"):
 
     return result
 
-def _get_playwright_page(timeout: int):
-    """获取一个 Playwright Page，多次调用共用浏览器实例。
-
-    若未安装 playwright 或启动失败，则返回 None。
+class _PlaywrightRenderer:
+    """
+    单个抓取线程持有的浏览器渲染器（sync API 不支持跨线程，渲染器按线程保存）：
+    - 复用同一个 context/page，每 playwright_context_pages 页换新 context 清理 cookie/存储；
+    - context 级路由拦截图片/字体/媒体/样式与常见统计脚本，只加载文档本身；
+    - 以 playwright_wait_until（默认 domcontentloaded）导航，再给 playwright_settle_ms 的短暂静默期；
+    - 累计渲染 playwright_recycle_pages 页或页面 JS 堆超过 playwright_max_heap_mb 时重启浏览器。
     """
-    global _PLAYWRIGHT, _BROWSER
 
-    if sync_playwright is None:
-        # 用户没装 playwright，直接放弃走回退逻辑
-        return None
+    def __init__(self):
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._page = None
+        self._context_pages = 0
+        self.pages_served = 0
+
+        self.wait_until = config.get("playwright_wait_until") or "domcontentloaded"
+        self.settle_ms = int(config.get("playwright_settle_ms", 800) or 0)
+        self.recycle_pages = int(config.get("playwright_recycle_pages", 200) or 0)
+        self.context_pages = int(config.get("playwright_context_pages", 20) or 0)
+        self.max_heap_bytes = int(config.get("playwright_max_heap_mb", 512) or 0) * 1024 * 1024
+        self.blocked_types = set(
+            config.get("playwright_block_resources")
+            or ("image", "media", "font", "stylesheet")
+        )
 
-    # 首次或异常后重建浏览器实例
-    if _PLAYWRIGHT is None or _BROWSER is None:
+    def _ensure_browser(self) -> bool:
+        if self._browser is not None and self._browser.is_connected():
+            return True
+        self.close()
         try:
-            _PLAYWRIGHT = sync_playwright().start()
+            self._playwright = sync_playwright().start()
             # 这里用 Chromium，你也可以改成 .firefox / .webkit
-            _BROWSER = _PLAYWRIGHT.chromium.launch(headless=True)
+            self._browser = self._playwright.chromium.launch(headless=True)
         except Exception:
-            _PLAYWRIGHT = None
-            _BROWSER = None
+            self.close()
+            return False
+        return True
+
+    def _route(self, route) -> None:
+        request = route.request
+        try:
+            host = (urlparse(request.url).hostname or "").lower()
+        except Exception:
+            host = ""
+        if request.resource_type in self.blocked_types or any(
+            host == t or host.endswith("." + t) for t in _TRACKER_HOSTS
+        ):
+            route.abort()
+        else:
+            route.continue_()
+
+    def _acquire_page(self):
+        if not self._ensure_browser():
             return None
+        if self._page is not None and self.context_pages and self._context_pages >= self.context_pages:
+            self._close_context()
+        if self._page is None:
+            self._context = self._browser.new_context()
+            self._context.route("**/*", self._route)
+            self._page = self._context.new_page()
+            self._context_pages = 0
+        return self._page
+
+    def _close_context(self) -> None:
+        for obj in (self._page, self._context):
+            if obj is None:
+                continue
+            try:
+                obj.close()
+            except Exception:
+                pass
+        self._page = None
+        self._context = None
 
-    try:
-        page = _BROWSER.new_page()
-        # 统一设置默认超时（Playwright 单位是 ms）
-        page.set_default_timeout(timeout * 1000)
-        return page
-    except Exception:
+    def close(self) -> None:
+        self._close_context()
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception:
+                pass
+        self._browser = None
+        self._playwright = None
+
+    def _heap_too_large(self, page) -> bool:
+        if not self.max_heap_bytes:
+            return False
+        try:
+            used = page.evaluate(
+                "() => (performance.memory && performance.memory.usedJSHeapSize) || 0"
+            )
+        except Exception:
+            return False
+        return int(used or 0) > self.max_heap_bytes
+
+    def render(self, url: str, timeout: int) -> Optional[Tuple[str, Dict[str, str]]]:
+        """渲染页面，返回 (html, 响应头)；浏览器不可用或渲染失败返回 None。"""
+        page = self._acquire_page()
+        if page is None:
+            return None
+
+        try:
+            page.set_default_timeout(timeout * 1000)
+            with get_host_scheduler().slot(url):
+                response = page.goto(url, wait_until=self.wait_until)
+            if self.settle_ms:
+                try:
+                    page.wait_for_load_state("networkidle", timeout=self.settle_ms)
+                except Exception:
+                    pass
+            html = page.content()
+            headers = response.headers if response else {}
+        except Exception:
+            # 出错的 page/context 不再复用
+            self._close_context()
+            return None
+        finally:
+            self.pages_served += 1
+            self._context_pages += 1
+
+        if (self.recycle_pages and self.pages_served % self.recycle_pages == 0) or self._heap_too_large(page):
+            self.close()
+        return html, headers
+
+
+def _get_renderer() -> Optional[_PlaywrightRenderer]:
+    """获取当前线程的渲染器；未安装 playwright 时返回 None。"""
+    if sync_playwright is None:
+        # 用户没装 playwright，直接放弃走回退逻辑
         return None
+    renderer = getattr(_PLAYWRIGHT_LOCAL, "renderer", None)
+    if renderer is None:
+        renderer = _PLAYWRIGHT_LOCAL.renderer = _PlaywrightRenderer()
+    return renderer
 
 
-def _prune_overlay_and_sensitive_blocks(soup: "BeautifulSoup") -> None:
-    """仅做两件事：
-    1) 删除明显的覆盖层/弹窗/横幅等（dialog/modal/popup/banner/overlay）；
-    2) 按敏感词命中删除块级节点（不做任何“正文保护/主块识别”）。
-    """
-    if soup is None:
-        return
+# 覆盖层/弹窗/横幅的 class/id 线索（低误伤）
+_OVERLAY_HINTS = (
+    "modal", "dialog", "popup", "overlay", "banner", "toast", "layer",
+    "mask", "backdrop", "float", "floating", "fixedbar",
+)
 
-    # ---- 1) 删除覆盖层/弹窗/横幅（低误伤）----
-    OVERLAY_HINTS = (
-        "modal", "dialog", "popup", "overlay", "banner", "toast", "layer",
-        "mask", "backdrop", "float", "floating", "fixedbar",
-    )
+# 清洗时整体删除的非正文标签
+_REMOVE_TAGS = (
+    "script", "style", "footer", "ins", "time", "ul", "li", "form", "input", "button",
+    "link", "head", "meta", "object", "svg",
+)
+
+_SENSITIVE_BLOCK_TAGS = ("div", "section", "article", "aside", "li", "p", "td")
+
+
+def _attr_text(tag, name: str) -> str:
+    v = tag.get(name)
+    if not v:
+        return ""
+    if isinstance(v, (list, tuple)):
+        return " ".join(map(str, v)).lower()
+    return str(v).lower()
+
+
+def _is_overlay(tag) -> bool:
+    role = _attr_text(tag, "role")
+    aria_modal = _attr_text(tag, "aria-modal")
+    if role in ("dialog", "alertdialog") or aria_modal == "true":
+        return True
+
+    cid = (_attr_text(tag, "id") + " " + _attr_text(tag, "class")).strip()
+    return bool(cid) and any(h in cid for h in _OVERLAY_HINTS)
+
+
+def _is_doc_href(href: str) -> bool:
+    h = (href or "").strip().lower()
+    if not h:
+        return False
+    if h.startswith(("#", "javascript:", "mailto:", "tel:")):
+        return False
+    return any(ext in h for ext in _DOC_LINK_EXTS)
+
+
+def _is_non_doc_anchor(a) -> bool:
+    """a 标签：非文档链接一律剔除（同时兼容 attrs=None、无 href）。"""
+    attrs = getattr(a, "attrs", None)
+    if not isinstance(attrs, dict):
+        return True
+
+    href_val = attrs.get("href", "")
+    href = href_val.strip().lower() if isinstance(href_val, str) else ""
+    return (not href) or (not _is_doc_href(href))
+
+
+def _has_excluded_class_or_id(tag) -> bool:
+    """class/id 命中 _EXCLUDE_KEYWORDS（防御：attrs 可能为 None）。"""
+    attrs = getattr(tag, "attrs", None)
+    if not isinstance(attrs, dict):
+        return False
+
+    for attr_name in ("class", "id"):
+        val = attrs.get(attr_name)
+        if not val:
+            continue
 
-    def _attr_text(tag, name: str) -> str:
-        v = tag.get(name)
-        if not v:
-            return ""
-        if isinstance(v, (list, tuple)):
-            return " ".join(map(str, v)).lower()
-        return str(v).lower()
-
-    def _is_overlay(tag) -> bool:
-        role = _attr_text(tag, "role")
-        aria_modal = _attr_text(tag, "aria-modal")
-        if role in ("dialog", "alertdialog") or aria_modal == "true":
+        if isinstance(val, (list, tuple)):
+            text = " ".join(map(str, val))
+        else:
+            text = str(val)
+
+        text = text.lower()
+        if any(kw in text for kw in _EXCLUDE_KEYWORDS):
             return True
 
-        cid = (_attr_text(tag, "id") + " " + _attr_text(tag, "class")).strip()
-        return bool(cid) and any(h in cid for h in OVERLAY_HINTS)
+    return False
 
-    for bad in list(soup.find_all(_is_overlay)):
-        bad.decompose()
 
-    # ---- 2) 按敏感词块级剔除（只做敏感词，不做正文保护）----
+def _scrub_attrs(tag) -> None:
+    """清空 data / data-* 属性值（保留属性名），删除 <img> 的 src。"""
+    attrs = getattr(tag, "attrs", None)
+    if not isinstance(attrs, dict):
+        return
+    for attr in list(attrs.keys()):
+        al = str(attr).lower()
+        if al == "data" or al.startswith("data-"):
+            attrs[attr] = ""
+    if tag.name == "img":
+        attrs.pop("src", None)
+
+
+def _sensitive_keywords() -> List[str]:
     raw_kw = (config.get("html_sensitive_keywords") or "").strip()
     if raw_kw:
-        sensitive_kws = [k.strip().lower() for k in raw_kw.split(",") if k.strip()]
-    else:
-        sensitive_kws = [
-            # 中文（保守）
-            "博彩", "赌场", "投注", "娱乐城", "色情", "裸聊", "约炮", "招嫖", "代孕"
-        ]
+        return [k.strip().lower() for k in raw_kw.split(",") if k.strip()]
+    return [
+        # 中文（保守）
+        "博彩", "赌场", "投注", "娱乐城", "色情", "裸聊", "约炮", "招嫖", "代孕"
+    ]
+
+
+class _KeywordMatcher:
+    """Aho-Corasick 多模式匹配：一次扫描找出全部关键字的出现位置。"""
+
+    def __init__(self, keywords: Tuple[str, ...]):
+        self.keywords = tuple(dict.fromkeys(k for k in keywords if k))
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for kw_index, kw in enumerate(self.keywords):
+            state = 0
+            for ch in kw:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(kw_index)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int]]:
+        """返回按起点排序的 (start, end)；同一关键字按 str.count 的语义只计不重叠的出现。"""
+        matches: List[Tuple[int, int]] = []
+        last_end = [0] * len(self.keywords)
+        state = 0
+        for pos, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for kw_index in self._out[state]:
+                end = pos + 1
+                start = end - len(self.keywords[kw_index])
+                if start >= last_end[kw_index]:
+                    last_end[kw_index] = end
+                    matches.append((start, end))
+        matches.sort()
+        return matches
+
+
+@lru_cache(maxsize=8)
+def _keyword_matcher(keywords: Tuple[str, ...]) -> _KeywordMatcher:
+    return _KeywordMatcher(keywords)
+
+
+def _prune_sensitive_blocks(soup) -> None:
+    """
+    按敏感词块级剔除（只做敏感词，不做正文保护）。
 
+    判定规则不变：块文本（get_text(" ", strip=True) 小写）命中 ≥2 次，或命中 1 次且不超过 600 字。
+    实现上一次遍历收集文本片段与各块的片段区间，对拼接后的全文只跑一遍多模式匹配，
+    再按区间统计每个块的命中数，避免逐块 get_text 与逐关键字 count 带来的重复扫描。
+    自上而下判定：祖先块已删除时其后代不再判定，与逐块 decompose 的结果一致。
+    """
+    sensitive_kws = _sensitive_keywords()
     if not sensitive_kws:
         return
 
-    BLOCK_TAGS = ("div", "section", "article", "aside", "li", "p", "td")
+    pieces: List[str] = []
+    # 每个块：[tag, 先序序号, 子树最大先序序号, 首片段下标, 片段结束下标]
+    blocks: List[List[Any]] = []
+    open_blocks: List[List[Any]] = []
+    seq = 0
+
+    stack: List[Tuple[Any, bool]] = [(child, False) for child in reversed(soup.contents)]
+    while stack:
+        node, leaving = stack.pop()
+        if leaving:
+            blk = open_blocks.pop()
+            blk[2] = seq
+            blk[4] = len(pieces)
+            continue
+        if isinstance(node, Tag):
+            seq += 1
+            if node.name in _SENSITIVE_BLOCK_TAGS:
+                blk = [node, seq, seq, len(pieces), len(pieces)]
+                blocks.append(blk)
+                open_blocks.append(blk)
+                stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node.contents))
+        elif type(node) in (NavigableString, CData):  # pylint: disable=unidiomatic-typecheck
+            stripped = node.strip()
+            if stripped:
+                pieces.append(stripped.lower())
+
+    if not blocks or not pieces:
+        return
+
+    offsets: List[int] = []
+    pos = 0
+    for piece in pieces:
+        offsets.append(pos)
+        pos += len(piece) + 1
+    matches = _keyword_matcher(tuple(sensitive_kws)).find_all(" ".join(pieces))
+    starts = [m[0] for m in matches]
+
+    skip_until = 0
+    for node, first_seq, last_seq, first_piece, end_piece in blocks:
+        if first_seq <= skip_until or end_piece <= first_piece:
+            continue
+        span_start = offsets[first_piece]
+        span_end = offsets[end_piece - 1] + len(pieces[end_piece - 1])
 
-    def _contains_sensitive(text: str) -> bool:
-        t = (text or "").lower()
-        if not t:
-            return False
         hits = 0
-        for kw in sensitive_kws:
-            hits += t.count(kw)
-            if hits >= 2:
-                return True
+        i = bisect_left(starts, span_start)
+        while i < len(matches) and matches[i][0] < span_end and hits < 2:
+            if matches[i][1] <= span_end:
+                hits += 1
+            i += 1
+
         # 只命中 1 次时，为了尽量减少误删：仅在短块上触发（广告/引流块更常见）
-        return hits >= 1 and len(t) <= 600
+        if hits >= 2 or (hits == 1 and span_end - span_start <= 600):
+            node.decompose()
+            skip_until = last_seq
 
-    for blk in list(soup.find_all(BLOCK_TAGS)):
-        txt = blk.get_text(" ", strip=True)
-        if txt and _contains_sensitive(txt):
-            blk.decompose()
 
-_DOC_LINK_EXTS = (".pdf", ".doc", ".docx")
+def _prune_overlay_and_sensitive_blocks(soup: "BeautifulSoup") -> None:
+    """仅做两件事：
+    1) 删除明显的覆盖层/弹窗/横幅等（dialog/modal/popup/banner/overlay）；
+    2) 按敏感词命中删除块级节点（不做任何“正文保护/主块识别”）。
+    """
+    if soup is None:
+        return
+
+    for bad in list(soup.find_all(_is_overlay)):
+        bad.decompose()
+
+    _prune_sensitive_blocks(soup)
+
 
 def _clean_body_html(html: str) -> str:
     """在 _extract_body_html 之后做进一步清洗：
@@ -555,6 +898,9 @@ def _clean_body_html(html: str) -> str:
     5) 删除所有 <img> 的 src 属性（保留 <img> 标签）；
     6) 删除 HTML 注释；
     7) 兜底：删除 body 中的 script/style 等。
+
+    逐条规则各做一次 find_all 的参考实现，html_clean_engine=legacy 时使用；
+    默认走 _extract_clean_body_html 的单次解析、单次遍历实现，两者输出一致。
     """
     if not html:
         return ""
@@ -565,137 +911,447 @@ def _clean_body_html(html: str) -> str:
         return html
 
     # 0) 兜底删除 body 内的明显非正文标签（按你要求扩展）
-    for s in soup.find_all(
-        ["script", "style", "footer", "ins", "time", "ul", "li", "form", "input", "button", "link", "head", "meta","object","svg"]
-    ):
+    for s in soup.find_all(list(_REMOVE_TAGS)):
         s.decompose()
 
     # 0.1) 删除 HTML 注释 <!-- ... -->
     for c in soup.find_all(string=lambda t: isinstance(t, Comment)):
         c.extract()
 
-    # 3) a 标签：非文档链接一律剔除（同时兼容 attrs=None、无 href）
-    def _is_doc_href(href: str) -> bool:
-        h = (href or "").strip().lower()
-        if not h:
-            return False
-        if h.startswith(("#", "javascript:", "mailto:", "tel:")):
-            return False
-        return any(ext in h for ext in _DOC_LINK_EXTS)
-
+    # 3) a 标签：非文档链接一律剔除
     for a in list(soup.find_all("a")):
-        attrs = getattr(a, "attrs", None)
-        if not isinstance(attrs, dict):
+        if _is_non_doc_anchor(a):
             a.decompose()
-            continue
 
-        href_val = attrs.get("href", "")
-        href = href_val.strip().lower() if isinstance(href_val, str) else ""
+    # 1) 删除命中 class/id 关键字的元素
+    for bad in list(soup.find_all(_has_excluded_class_or_id)):
+        bad.decompose()
 
-        if (not href) or (not _is_doc_href(href)):
-            a.decompose()
+    # 覆盖层/敏感块剔除逻辑保留
+    _prune_overlay_and_sensitive_blocks(soup)
 
-    # 1) 删除命中 class/id 关键字的元素（防御：attrs 可能为 None）
-    def _should_remove(tag) -> bool:
-        attrs = getattr(tag, "attrs", None)
-        if not isinstance(attrs, dict):
-            return False
+    # 4) 清空 data / data-* 属性值；5) 删除 <img> 的 src
+    for tag in soup.find_all(True):
+        _scrub_attrs(tag)
 
-        for attr_name in ("class", "id"):
-            val = attrs.get(attr_name)
-            if not val:
-                continue
+    if soup.body is not None:
+        return str(soup.body)
+    return str(soup)
 
-            if isinstance(val, (list, tuple)):
-                text = " ".join(map(str, val))
-            else:
-                text = str(val)
 
-            text = text.lower()
-            if any(kw in text for kw in _EXCLUDE_KEYWORDS):
-                return True
+def _should_drop_tag(tag) -> bool:
+    """单次遍历中判断节点是否整体删除；各条件只依赖节点自身，与删除顺序无关。"""
+    if tag.name in _REMOVE_TAGS:
+        return True
+    if tag.name == "a" and _is_non_doc_anchor(tag):
+        return True
+    return _has_excluded_class_or_id(tag) or _is_overlay(tag)
 
-        return False
 
-    for bad in list(soup.find_all(_should_remove)):
-        bad.decompose()
+def _parse_and_clean(html: str):
+    """单次解析并清洗，返回清洗后的根节点（body 或整个文档）；body 本身被规则删除时返回 None。"""
+    soup = BeautifulSoup(html, config.get("html_parser") or _HTML_PARSER)
 
-    # 覆盖层/敏感块剔除逻辑保留
-    _prune_overlay_and_sensitive_blocks(soup)
+    root = soup.body if soup.body is not None else soup
+    if root is not soup:
+        if _should_drop_tag(root):
+            return None
+        _scrub_attrs(root)
+
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        for child in list(node.contents):
+            if isinstance(child, Comment):
+                child.extract()
+            elif isinstance(child, Tag):
+                if _should_drop_tag(child):
+                    child.decompose()
+                else:
+                    _scrub_attrs(child)
+                    stack.append(child)
+
+    _prune_sensitive_blocks(root)
+    return root
+
+
+def _extract_clean_body_html(html: str) -> str:
+    """
+    单次解析 + 单次遍历完成 _extract_body_html + _clean_body_html 的全部规则：
+    - 只解析一次（默认 html.parser，可用 html_parser 配置改为 lxml），不再 str(soup) 往返二次解析；
+    - 一次先序遍历同时处理注释、整标签删除（标签名/非文档链接/class-id 关键字/覆盖层）与 data-*/img src；
+    - 敏感块依赖剔除后的文本，遍历结束后再做一轮。
+    使用 html.parser 时输出与 _clean_body_html(_extract_body_html(html)) 一致（见 check_html_clean_parity.py）；
+    lxml 对不规范嵌套的修复方式不同，输出会有差异。
+    """
+    if not html:
+        return ""
+    if BeautifulSoup is None:
+        return _extract_body_html(html)
 
-    # 4) 清空 data / data-* 属性值（防御：attrs 可能为 None）
-    for tag in soup.find_all(True):
-        attrs = getattr(tag, "attrs", None)
-        if not isinstance(attrs, dict):
+    try:
+        root = _parse_and_clean(html)
+    except Exception:
+        return html
+    return str(root) if root is not None else ""
+
+
+_MD_BLOCK_TAGS = (
+    "address", "article", "aside", "blockquote", "body", "center", "dd", "details",
+    "div", "dl", "dt", "fieldset", "figcaption", "figure", "header", "html", "li",
+    "main", "nav", "ol", "p", "section", "summary", "ul",
+)
+_MD_HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+
+
+def _md_collapse(text: str) -> str:
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def _md_link(tag) -> str:
+    """清洗后保留下来的 a 只剩文档链接，输出为 [文本](href)。"""
+    href = tag.get("href") if isinstance(getattr(tag, "attrs", None), dict) else ""
+    text = _md_collapse(tag.get_text(" "))
+    if not isinstance(href, str) or not href.strip():
+        return text
+    return f"[{text or href.strip()}]({href.strip()})"
+
+
+def _md_inline(node, nested_tables: Optional[List[Any]] = None) -> str:
+    """
+    行内文本：折叠空白，文档链接保留为 Markdown 链接。
+    传入 nested_tables 时，其中的表格不展开为文本，而是收集到该列表由调用方单独输出。
+    """
+    parts: List[str] = []
+    for child in node.children:
+        if isinstance(child, Tag):
+            if child.name == "a":
+                parts.append(" " + _md_link(child) + " ")
+            elif child.name == "br":
+                parts.append(" ")
+            elif child.name == "table" and nested_tables is not None:
+                nested_tables.append(child)
+                parts.append(" ")
+            else:
+                parts.append(_md_inline(child, nested_tables))
+        elif type(child) in (NavigableString, CData):  # pylint: disable=unidiomatic-typecheck
+            parts.append(str(child))
+    return _md_collapse("".join(parts))
+
+
+def _md_table(table) -> str:
+    """
+    表格转 Markdown；单列的排版表格直接按行输出文本。
+    只取属于本表的行（find_all 会递归到嵌套表格）；单元格内的嵌套表格各自单独渲染一次：
+    单列排版表格就地插在所在行之后，多列表格统一放在本表之后；嵌套表格前后以空行分隔，同一内容只输出一次。
+    """
+    rows: List[List[str]] = []
+    row_nested: List[List[str]] = []
+    for tr in table.find_all("tr"):
+        if tr.find_parent("table") is not table:
+            continue
+        nested: List[Any] = []
+        cells = [
+            _md_inline(cell, nested).replace("|", "\\|")
+            for cell in tr.find_all(["th", "td"], recursive=False)
+        ]
+        nested_md = [text for text in (_md_table(t) for t in nested) if text]
+        if any(cells) or nested_md:
+            rows.append(cells or [""])
+            row_nested.append(nested_md)
+    if not rows:
+        return _md_collapse(table.get_text(" "))
+
+    width = max(len(r) for r in rows)
+    if width == 1:
+        # 相邻的文本行合为一段；嵌套表格单独成块，前后空行分隔
+        blocks: List[str] = []
+        lines = []
+        for row, nested_md in zip(rows, row_nested):
+            if row[0]:
+                lines.append(row[0])
+            if nested_md:
+                if lines:
+                    blocks.append("\n".join(lines))
+                    lines = []
+                blocks.extend(nested_md)
+        if lines:
+            blocks.append("\n".join(lines))
+        return "\n\n".join(blocks)
+
+    lines = []
+    trailing: List[str] = []
+    for i, (row, nested_md) in enumerate(zip(rows, row_nested)):
+        row = row + [""] * (width - len(row))
+        lines.append("| " + " | ".join(row) + " |")
+        if i == 0:
+            lines.append("|" + " --- |" * width)
+        trailing.extend(nested_md)
+    # 嵌套表格与外层表格之间空一行，否则会被 Markdown 读成同一张表
+    return "\n\n".join(["\n".join(lines), *trailing])
+
+
+def _html_to_markdown(root) -> str:
+    """
+    把清洗后的 DOM 转为紧凑的 Markdown 风格文本：
+    保留标题层级、表格、文档链接与段落分隔，丢弃其余标签、属性与包裹层，
+    用于压缩送入 qwen-long 的 web_content 体积。
+    """
+    blocks: List[str] = []
+    buf: List[str] = []
+
+    def flush():
+        text = _md_collapse("".join(buf))
+        if text:
+            blocks.append(text)
+        buf.clear()
+
+    stack: List[Any] = [iter(root.contents)]
+    block_exits: List[bool] = [False]
+    while stack:
+        try:
+            child = next(stack[-1])
+        except StopIteration:
+            stack.pop()
+            if block_exits.pop():
+                flush()
             continue
-        for attr in list(attrs.keys()):
-            al = str(attr).lower()
-            if al == "data" or al.startswith("data-"):
-                attrs[attr] = ""
 
-    # 5) 删除 <img> 的 src（防御：attrs 可能为 None）
-    for img in soup.find_all("img"):
-        attrs = getattr(img, "attrs", None)
-        if isinstance(attrs, dict):
-            attrs.pop("src", None)
+        if isinstance(child, Tag):
+            name = child.name
+            if name in _MD_HEADINGS:
+                flush()
+                text = _md_inline(child)
+                if text:
+                    blocks.append("#" * _MD_HEADINGS[name] + " " + text)
+            elif name == "table":
+                flush()
+                text = _md_table(child)
+                if text:
+                    blocks.append(text)
+            elif name == "a":
+                buf.append(" " + _md_link(child) + " ")
+            elif name == "br":
+                flush()
+            elif name == "pre":
+                flush()
+                text = child.get_text().strip("\n")
+                if text.strip():
+                    blocks.append(text)
+            else:
+                is_block = name in _MD_BLOCK_TAGS
+                if is_block:
+                    flush()
+                stack.append(iter(child.contents))
+                block_exits.append(is_block)
+        elif type(child) in (NavigableString, CData):  # pylint: disable=unidiomatic-typecheck
+            buf.append(str(child))
 
-    if soup.body is not None:
-        return str(soup.body)
-    return str(soup)
+    flush()
+    return "\n".join(blocks)
 
-def _fetch_url_content(url: str, timeout: int = 15) -> str:
-    """下载网页并返回 <body> 的 HTML。
 
-    流程保持不变：
-    - 先 Playwright：page.content() -> _extract_body_html()（抽取 body + 删 script/style）
-                      -> _clean_body_html()
-    - 再 fallback 为 requests：字节级解码 -> _extract_body_html() -> _clean_body_html()
+def _web_content_format() -> str:
+    fmt = (config.get("web_content_format") or "markdown").lower()
+    return fmt if fmt in ("html", "markdown") else "markdown"
+
+
+def _clean_page_html(html: str) -> str:
     """
-    if not url:
+    抽取并清洗页面 body：
+    - html_clean_engine 选择实现（single / legacy）；
+    - web_content_format 选择输出（markdown 紧凑文本 / html 清洗后的 HTML）。
+    """
+    as_markdown = _web_content_format() == "markdown"
+
+    if (config.get("html_clean_engine") or "single").lower() == "legacy":
+        body_html = _extract_body_html(html)
+        body_html = _clean_body_html(body_html)
+        if not (as_markdown and BeautifulSoup and body_html):
+            return body_html
+        soup = BeautifulSoup(body_html, "html.parser")
+        return _html_to_markdown(soup.body if soup.body is not None else soup)
+
+    if not as_markdown:
+        return _extract_clean_body_html(html)
+    if not html:
         return ""
+    if BeautifulSoup is None:
+        return _extract_body_html(html)
+    try:
+        root = _parse_and_clean(html)
+    except Exception:
+        return html
+    return _html_to_markdown(root) if root is not None else ""
 
-    # 1. 优先 Playwright
-    page = _get_playwright_page(timeout)
-    if page is not None:
+
+def _canonical_url(url: str) -> str:
+    """规范化 URL 作为内容缓存键：小写 scheme/host、去默认端口与 fragment、剔除 utm_* 等跟踪参数并排序 query。"""
+    try:
+        parts = urlsplit((url or "").strip())
+        host = (parts.hostname or "").lower()
+        port = parts.port
+    except Exception:
+        return url or ""
+
+    scheme = (parts.scheme or "http").lower()
+    netloc = host
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        netloc = f"{host}:{port}"
+
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not (k.lower().startswith("utm_") or k.lower() == "spm")
+    )
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
+
+
+def _extract_validators(headers) -> Dict[str, str]:
+    """从响应头中取出 ETag / Last-Modified（兼容 requests 与 Playwright 的 headers）。"""
+    out: Dict[str, str] = {}
+    if not headers:
+        return out
+    for name in ("etag", "last-modified"):
         try:
-            page.goto(url, wait_until="networkidle")
-            html = page.content()
-            page.close()
-            html = (html or "").strip()
-            if html:
-                # 这里仍然调用你原来的逻辑：抽取 body + 删除 body 内 script/style
-                body_html = _extract_body_html(html)
-                # 在此基础上再加 class/id 过滤 和 img 去 src
-                body_html = _clean_body_html(body_html)
-                return body_html.strip()
+            value = headers.get(name) or headers.get(name.title()) or ""
         except Exception:
-            try:
-                page.close()
-            except Exception:
-                pass
-            # 继续走 requests 兜底
+            value = ""
+        if value:
+            out[name] = value
+    return out
+
+
+def _get_content_cache() -> Optional[TieredCache]:
+    """网页正文缓存（按规范化 URL），content_cache_enabled=false 时关闭。"""
+    global _CONTENT_CACHE  # pylint: disable=global-statement
+    if not config.get("content_cache_enabled", True):
+        return None
+    with _CONTENT_CACHE_LOCK:
+        if _CONTENT_CACHE is None:
+            _CONTENT_CACHE = TieredCache(
+                namespace="url_content",
+                path=config.get("search_cache_path", "cache/polymind_cache.sqlite3"),
+                memory_size=int(config.get("content_cache_memory_size", 128) or 128),
+            )
+    return _CONTENT_CACHE
+
+
+def _bump_content_stat(name: str, amount: float = 1) -> None:
+    with _CONTENT_CACHE_LOCK:
+        _CONTENT_CACHE_STATS[name] = _CONTENT_CACHE_STATS.get(name, 0) + amount
+
+
+def get_content_cache_stats() -> Dict[str, float]:
+    """返回正文缓存的命中统计：hits（直接命中）、revalidated（304 复用）、misses、saved_seconds（估算节省的抓取耗时）。"""
+    with _CONTENT_CACHE_LOCK:
+        return dict(_CONTENT_CACHE_STATS)
+
+
+def _revalidate(url: str, entry: Dict, timeout: int) -> bool:
+    """带 If-None-Match / If-Modified-Since 的条件 GET，返回 True 表示内容未变化（304）。"""
+    headers = {"User-Agent": "PolyMindBot/1.0"}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last-modified"):
+        headers["If-Modified-Since"] = entry["last-modified"]
+    if len(headers) == 1:
+        return False
 
-    # 2. 回退方案：requests + 显式编码处理
     try:
-        response = requests.get(
-            url,
-            timeout=timeout,
-            headers={"User-Agent": "PolyMindBot/1.0"},
-        )
-        response.raise_for_status()
+        with get_host_scheduler().slot(url):
+            response = http_client.get(url, timeout=timeout, headers=headers, stream=True)
+        response.close()
     except Exception:
+        return False
+    return response.status_code == 304
+
+
+def _probe_matches_entry(probe: Optional[_UrlProbe], entry: Dict) -> bool:
+    """分类响应的 ETag / Last-Modified 与缓存一致时，说明内容未变化，可省去条件 GET。"""
+    if probe is None or not probe.ok:
+        return False
+    current = _extract_validators(probe.response.headers)
+    if entry.get("etag") and current.get("etag"):
+        return entry["etag"] == current["etag"]
+    if entry.get("last-modified") and current.get("last-modified"):
+        return entry["last-modified"] == current["last-modified"]
+    return False
+
+
+def _fetch_url_content(url: str, timeout: int = 15, probe: Optional[_UrlProbe] = None) -> str:
+    """
+    带缓存的网页抓取：按规范化 URL 缓存清洗后的正文与 ETag/Last-Modified。
+    - content_cache_fresh_seconds 内直接复用；
+    - 超过后先比对分类响应的校验头，一致则复用；否则用条件 GET 校验，304 则复用，
+      仍不一致时重新抓取（优先读取分类阶段未消费的响应）并更新缓存。
+    """
+    if not url:
         return ""
 
-    raw = response.content or b""
+    cache = _get_content_cache()
+    if cache is None:
+        return _fetch_url_content_uncached(url, timeout=timeout, probe=probe)[0]
+
+    # 不同输出格式的正文分开缓存
+    key = f"{_web_content_format()}|{_canonical_url(url)}"
+    entry = cache.get(key)
+    ttl = int(config.get("content_cache_ttl", 7 * 24 * 3600) or 0) or None
+    if entry and entry.get("body"):
+        fresh_seconds = float(config.get("content_cache_fresh_seconds", 3600) or 0)
+        if time.time() - float(entry.get("fetched_at") or 0) <= fresh_seconds:
+            _bump_content_stat("hits")
+            _bump_content_stat("saved_seconds", float(entry.get("fetch_seconds") or 0))
+            return entry["body"]
+
+        started = time.monotonic()
+        if _probe_matches_entry(probe, entry) or (probe is None and _revalidate(url, entry, timeout)):
+            entry["fetched_at"] = time.time()
+            cache.put(key, entry, ttl=ttl)
+            _bump_content_stat("revalidated")
+            _bump_content_stat(
+                "saved_seconds",
+                max(0.0, float(entry.get("fetch_seconds") or 0) - (time.monotonic() - started)),
+            )
+            return entry["body"]
+
+    _bump_content_stat("misses")
+    started = time.monotonic()
+    body, validators = _fetch_url_content_uncached(url, timeout=timeout, probe=probe)
+    if body:
+        entry = {
+            "body": body,
+            "fetched_at": time.time(),
+            "fetch_seconds": round(time.monotonic() - started, 3),
+        }
+        entry.update(validators)
+        cache.put(key, entry, ttl=ttl)
+    return body
+
 
-    # 2.1 响应头 charset
+def _render_and_clean(url: str, timeout: int) -> Optional[Tuple[str, Dict[str, str]]]:
+    """Playwright 渲染并清洗；不可用或失败返回 None。"""
+    renderer = _get_renderer()
+    rendered = renderer.render(url, timeout) if renderer is not None else None
+    if rendered is None:
+        return None
+    html, headers = rendered
+    html = (html or "").strip()
+    if not html:
+        return None
+    # 抽取 body 并清洗（script/style、class/id 过滤、img 去 src 等）
+    return _clean_page_html(html).strip(), _extract_validators(headers)
+
+
+def _decode_response_text(raw: bytes, content_type: str) -> str:
+    """按响应头 charset -> meta charset -> 字节探测的顺序解码正文。"""
+    # 1 响应头 charset
     encoding: Optional[str] = None
-    content_type = response.headers.get("content-type", "").lower()
     m = re.search(r"charset=([\w\-]+)", content_type)
     if m:
         encoding = m.group(1).strip("'\" ").lower()
 
-    # 2.2 若没写 charset，从 meta 里探测（只看前几 KB）
+    # 2 若没写 charset，从 meta 里探测（只看前几 KB）
     if not encoding and raw:
         head = raw[:8192].decode("ascii", errors="ignore")
         m_meta = re.search(
@@ -705,34 +1361,144 @@ def _fetch_url_content(url: str, timeout: int = 15) -> str:
         if m_meta:
             encoding = m_meta.group(1).strip().lower()
 
-    # 2.3 再退一步，用 apparent_encoding
-    if not encoding:
+    # 3 再退一步，按字节内容探测（等同 response.apparent_encoding，流式读取后也可用）
+    if not encoding and raw and chardet is not None:
         try:
-            encoding = (response.apparent_encoding or "").lower()
+            encoding = (chardet.detect(raw).get("encoding") or "").lower()
         except Exception:
             encoding = ""
 
-    # 2.4 统一中文编码
+    # 4 统一中文编码
     if encoding in ("gb2312", "gbk", "gb-2312", "gb_2312"):
         encoding = "gb18030"
     if not encoding:
         encoding = "utf-8"
 
-    # 2.5 解码
+    # 5 解码
     try:
-        text = raw.decode(encoding, errors="replace")
+        return raw.decode(encoding, errors="replace")
     except LookupError:
-        text = raw.decode("utf-8", errors="replace")
+        return raw.decode("utf-8", errors="replace")
+
+
+def _fetch_static(
+    url: str, timeout: int, probe: Optional[_UrlProbe] = None
+) -> Optional[Tuple[str, str, Dict[str, str]]]:
+    """
+    requests 直接抓取并解码，返回 (text, content_type, 校验头)；失败返回 None。
+    probe 为分类阶段尚未消费的响应时直接读取剩余内容，不再发起新请求。
+    """
+    if probe is not None and probe.readable:
+        try:
+            raw = probe.read_all()
+        except Exception:
+            raw = None
+        if raw is not None:
+            content_type = probe.content_type.lower()
+            text = _decode_response_text(raw, content_type)
+            return text, content_type, _extract_validators(probe.response.headers)
+
+    try:
+        with get_host_scheduler().slot(url):
+            response = http_client.get(
+                url,
+                timeout=timeout,
+                headers={"User-Agent": "PolyMindBot/1.0"},
+            )
+        response.raise_for_status()
+    except Exception:
+        return None
+
+    content_type = response.headers.get("content-type", "").lower()
+    text = _decode_response_text(response.content or b"", content_type)
+    return text, content_type, _extract_validators(response.headers)
+
+
+_JS_SHELL_ROOT_RE = re.compile(
+    r"(?is)<div[^>]+id=['\"](?:app|root|__next|__nuxt|main-app)['\"][^>]*>\s*</div>"
+)
+_JS_SHELL_NOSCRIPT_RE = re.compile(
+    r"(?is)<noscript[^>]*>[^<]*(?:enable\s+javascript|javascript\s+is\s+(?:disabled|required)"
+    r"|(?:启用|开启|打开|需要|支持)\s*javascript)"
+)
+
+
+def _looks_like_js_shell(html: str) -> bool:
+    """
+    判断静态 HTML 是否只是前端渲染的空壳：
+    - 去掉脚本/样式后的可见文字少于 render_min_text_chars；
+    - 或存在空的 SPA 挂载点（#app/#root/#__next 等）/ noscript 提示开启 JavaScript，且可见文字不多。
+    """
+    if not html:
+        return True
+    visible = re.sub(r"(?is)<(script|style|noscript|template)[^>]*>.*?</\1>", " ", html)
+    visible = re.sub(r"(?s)<[^>]+>", " ", visible)
+    text_len = len(re.sub(r"\s+", "", unescape(visible)))
+
+    min_chars = int(config.get("render_min_text_chars", 200) or 0)
+    if text_len < min_chars:
+        return True
+    if text_len < max(min_chars * 5, 1000) and (
+        _JS_SHELL_ROOT_RE.search(html) or _JS_SHELL_NOSCRIPT_RE.search(html)
+    ):
+        return True
+    return False
+
+
+def _render_mode() -> str:
+    mode = (config.get("search_render_mode") or "adaptive").lower()
+    return mode if mode in ("adaptive", "playwright", "static") else "adaptive"
+
+
+def _fetch_url_content_uncached(
+    url: str, timeout: int = 15, probe: Optional[_UrlProbe] = None
+) -> Tuple[str, Dict[str, str]]:
+    """下载网页并返回 (清洗后的 body, 缓存校验头 ETag/Last-Modified)。
+    probe 为分类阶段的响应，静态抓取时直接复用。
+
+    search_render_mode 决定渲染方式：
+    - playwright：保持原流程，先 Playwright 渲染，失败回退 requests；
+    - static：只用 requests；
+    - adaptive（默认）：先 requests，静态 HTML 像 JS 空壳（文字极少、空 SPA 挂载点、noscript 提示）
+      或静态抓取失败时才升级到 Playwright；结论按域名记住，后续同站点直接走对应方式。
+    """
+    if not url:
+        return "", {}
+
+    mode = _render_mode()
+    host = HostScheduler.host_of(url)
+    rendered_tried = False
+
+    # 1. 需要渲染的：playwright 模式，或 adaptive 下该域名已判定为需渲染
+    if mode == "playwright" or (mode == "adaptive" and _RENDER_DECISIONS.get(host) == "render"):
+        rendered_tried = True
+        rendered = _render_and_clean(url, timeout)
+        if rendered is not None:
+            return rendered
+        # 渲染失败则继续走 requests 兜底
+
+    # 2. requests + 显式编码处理
+    static = _fetch_static(url, timeout, probe=probe)
+    if static is None:
+        if mode == "adaptive" and not rendered_tried:
+            return _render_and_clean(url, timeout) or ("", {})
+        return "", {}
+
+    text, content_type, validators = static
 
     # 只对 HTML 做 body 抽取 + 清洗
     if "html" in content_type:
-        # 先用原有函数抽 body + 去 script/style
-        text = _extract_body_html(text)
-        # 再做 class/id 过滤 和 img 去 src
-        text = _clean_body_html(text)
-
-    return text.strip()
+        if mode == "adaptive" and not rendered_tried:
+            if _looks_like_js_shell(text):
+                _RENDER_DECISIONS.put(host, "render", time.time() + _RENDER_DECISION_TTL)
+                rendered = _render_and_clean(url, timeout)
+                if rendered is not None:
+                    return rendered
+            else:
+                _RENDER_DECISIONS.put(host, "static", time.time() + _RENDER_DECISION_TTL)
+        text = _clean_page_html(text)
 
+    return text.strip(), validators
 
 
 def _extract_body_html(html: str) -> str:
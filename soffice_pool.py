@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+import atexit
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from config import ConfigHelper
+
+try:
+    import uno  # LibreOffice 自带的 Python-UNO 桥
+    from com.sun.star.beans import PropertyValue
+except Exception:  # pragma: no cover - optional dependency
+    uno = None
+    PropertyValue = None
+
+config = ConfigHelper()
+
+
+def find_soffice() -> Optional[str]:
+    return shutil.which("soffice") or shutil.which("libreoffice")
+
+
+class _Job:
+    __slots__ = ("src", "dst", "future")
+
+    def __init__(self, src: Path, dst: Path):
+        self.src = src
+        self.dst = dst
+        self.future: Future = Future()
+
+
+class _SofficeWorker:
+    """
+    一个 soffice 工作者，独占自己的用户配置目录（UserInstallation），多个工作者可同时转换互不冲突。
+    - uno 模式：常驻 headless 监听进程（--accept socket），经 UNO 逐个加载/另存，没有冷启动；
+    - cli 模式：每批文件一次 `soffice --convert-to` 调用，配置目录复用，省去首次初始化。
+    进程崩溃或转换超时会被杀掉并在下一批前重启。
+    """
+
+    def __init__(self, index: int, soffice: str, root: Path, mode: str, port: int):
+        self.index = index
+        self.soffice = soffice
+        self.mode = mode
+        self.port = port
+        self.profile = root / f"profile_{index}"
+        self.staging = root / f"staging_{index}"
+        self.staging.mkdir(parents=True, exist_ok=True)
+        self.proc: Optional[subprocess.Popen] = None
+        self.desktop = None
+        self.restarts = 0
+
+    def _profile_arg(self) -> str:
+        return f"-env:UserInstallation={self.profile.resolve().as_uri()}"
+
+    # ---------- uno 模式 ----------
+    def _start_listener(self, startup_timeout: float) -> None:
+        self.stop()
+        self.proc = subprocess.Popen(
+            [
+                self.soffice,
+                self._profile_arg(),
+                "--headless",
+                "--invisible",
+                "--nologo",
+                "--norestore",
+                "--nodefault",
+                f"--accept=socket,host=127.0.0.1,port={self.port};urp;",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local
+        )
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            try:
+                ctx = resolver.resolve(
+                    f"uno:socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext"
+                )
+                self.desktop = ctx.ServiceManager.createInstanceWithContext(
+                    "com.sun.star.frame.Desktop", ctx
+                )
+                return
+            except Exception:
+                if self.proc.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError(f"soffice 监听进程启动失败（port={self.port}）")
+                time.sleep(0.5)
+
+    @staticmethod
+    def _props(**kwargs) -> Tuple:
+        return tuple(PropertyValue(Name=k, Value=v) for k, v in kwargs.items())
+
+    def _convert_uno(self, items: List[Tuple[Path, Path]], timeout: float) -> None:
+        if self.proc is None or self.proc.poll() is not None or self.desktop is None:
+            self._start_listener(float(config.get("soffice_startup_timeout", 60) or 60))
+
+        # UNO 调用无法中断，超时由看门狗杀进程，正在进行的调用随之抛异常
+        watchdog = threading.Timer(timeout, self.stop)
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            for src, out in items:
+                doc = self.desktop.loadComponentFromURL(
+                    uno.systemPathToFileUrl(str(src.resolve())),
+                    "_blank",
+                    0,
+                    self._props(Hidden=True, ReadOnly=True),
+                )
+                try:
+                    doc.storeToURL(
+                        uno.systemPathToFileUrl(str(out.resolve())),
+                        self._props(FilterName="MS Word 2007 XML"),
+                    )
+                finally:
+                    doc.close(True)
+        finally:
+            watchdog.cancel()
+
+    # ---------- cli 模式 ----------
+    def _convert_cli(self, items: List[Tuple[Path, Path]], timeout: float) -> None:
+        subprocess.run(
+            [
+                self.soffice,
+                self._profile_arg(),
+                "--headless",
+                "--norestore",
+                "--nologo",
+                "--convert-to",
+                "docx",
+                "--outdir",
+                str(self.staging),
+                *[str(src) for src, _ in items],
+            ],
+            capture_output=True,
+            timeout=timeout,
+            check=False,
+        )
+
+    def convert(self, jobs: List[_Job], timeout: float) -> None:
+        """转换一批文件：输入先以唯一名放入暂存目录，避免同名文件互相覆盖；结果改名到各自 dst。"""
+        items: List[Tuple[Path, Path]] = []
+        for job in jobs:
+            name = uuid.uuid4().hex
+            staged = self.staging / f"{name}{job.src.suffix.lower()}"
+            try:
+                os.link(job.src, staged)
+            except OSError:
+                shutil.copyfile(job.src, staged)
+            items.append((staged, self.staging / f"{name}.docx"))
+
+        try:
+            if self.mode == "uno":
+                self._convert_uno(items, timeout)
+            else:
+                self._convert_cli(items, timeout)
+        finally:
+            for (staged, out), job in zip(items, jobs):
+                try:
+                    staged.unlink()
+                except OSError:
+                    pass
+                if out.exists() and out.stat().st_size > 0:
+                    job.dst.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(out, job.dst)
+
+    def restart(self) -> None:
+        """崩溃/超时后：结束进程，重建可能已损坏的配置目录。"""
+        self.stop()
+        self.restarts += 1
+        shutil.rmtree(self.profile, ignore_errors=True)
+
+    def stop(self) -> None:
+        self.desktop = None
+        proc, self.proc = self.proc, None
+        if proc is not None and proc.poll() is None:
+            proc.kill()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                pass
+
+
+class SofficePool:
+    """
+    LibreOffice 转换服务：size 个工作者各自一个线程，从共享队列取任务；
+    取到任务后再等待 batch_wait 秒收集更多任务，一次最多 batch_size 个文件合并转换。
+    """
+
+    def __init__(
+        self,
+        soffice: str,
+        root: Path,
+        size: int = 2,
+        mode: str = "auto",
+        batch_size: int = 8,
+        batch_wait: float = 0.1,
+        timeout: float = 120,
+        base_port: int = 2002,
+    ):
+        if mode == "auto":
+            mode = "uno" if uno is not None else "cli"
+        if mode == "uno" and uno is None:
+            mode = "cli"
+        self.mode = mode
+        self.batch_size = max(1, int(batch_size))
+        self.batch_wait = max(0.0, float(batch_wait))
+        self.timeout = float(timeout)
+        self._queue: "queue.Queue[Optional[_Job]]" = queue.Queue()
+        self.workers = [
+            _SofficeWorker(i, soffice, Path(root), mode, base_port + i) for i in range(max(1, int(size)))
+        ]
+        self._threads = [
+            threading.Thread(target=self._run, args=(w,), name=f"soffice-{w.index}", daemon=True)
+            for w in self.workers
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, src: Path, dst: Path) -> Future:
+        """提交一个 .doc -> .docx 转换任务，Future 结果为 dst。"""
+        job = _Job(Path(src), Path(dst))
+        self._queue.put(job)
+        return job.future
+
+    def convert(self, src: Path, dst: Path, timeout: Optional[float] = None) -> Path:
+        return self.submit(src, dst).result(timeout=timeout)
+
+    def _take_batch(self) -> Optional[List[_Job]]:
+        first = self._queue.get()
+        if first is None:
+            # 关闭信号留给其他工作者线程
+            self._queue.put(None)
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                self._queue.put(None)
+                break
+            batch.append(job)
+        return batch
+
+    def _run(self, worker: _SofficeWorker) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                worker.stop()
+                return
+            batch = [job for job in batch if job.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            pending = batch
+            error: Optional[BaseException] = None
+            # 失败时重启工作者，把未完成的文件再试一次
+            for attempt in range(2):
+                if attempt:
+                    worker.restart()
+                try:
+                    worker.convert(pending, self.timeout)
+                    error = None
+                except Exception as exc:  # pylint: disable=broad-except
+                    error = exc
+                for job in pending:
+                    if job.dst.exists():
+                        job.future.set_result(job.dst)
+                pending = [job for job in pending if not job.future.done()]
+                if not pending:
+                    break
+            for job in pending:
+                job.future.set_exception(
+                    error or RuntimeError(f"soffice 未能转换 {job.src.name}")
+                )
+
+    def close(self) -> None:
+        self._queue.put(None)
+        for t in self._threads:
+            t.join(timeout=30)
+        for w in self.workers:
+            w.stop()
+
+
+_POOL: Optional[SofficePool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_soffice_pool() -> Optional[SofficePool]:
+    """进程内共用的转换池；未安装 LibreOffice 时返回 None。"""
+    global _POOL  # pylint: disable=global-statement
+    with _POOL_LOCK:
+        if _POOL is None:
+            soffice = find_soffice()
+            if not soffice:
+                return None
+            _POOL = SofficePool(
+                soffice=soffice,
+                root=Path(config.get("soffice_work_dir", "cache/soffice")),
+                size=int(config.get("soffice_pool_size", 2) or 2),
+                mode=(config.get("soffice_mode") or "auto").lower(),
+                batch_size=int(config.get("soffice_batch_size", 8) or 8),
+                batch_wait=float(config.get("soffice_batch_wait_ms", 100) or 0) / 1000.0,
+                timeout=float(config.get("soffice_timeout", 120) or 120),
+                base_port=int(config.get("soffice_base_port", 2002) or 2002),
+            )
+            atexit.register(_POOL.close)
+    return _POOL
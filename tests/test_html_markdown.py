@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+bs4 = pytest.importorskip("bs4")
+pytest.importorskip("requests")
+
+import search_service as ss  # noqa: E402
+
+
+def _tables(html):
+    soup = bs4.BeautifulSoup(html, "html.parser")
+    return soup.find_all("table", recursive=False)
+
+
+def test_multi_column_table_nested_in_multi_column_table():
+    html = (
+        "<table><tr><th>A</th><th>B</th></tr>"
+        "<tr><td>1<table><tr><th>n1</th><th>n2</th></tr><tr><td>x</td><td>y</td></tr></table></td><td>2</td></tr>"
+        "</table>"
+    )
+    text = ss._md_table(_tables(html)[0])
+    outer, nested = text.split("\n\n")
+    assert outer == "| A | B |\n| --- | --- |\n| 1 | 2 |"
+    assert nested == "| n1 | n2 |\n| --- | --- |\n| x | y |"
+    # 嵌套表格的内容只输出一次
+    assert text.count("n1") == 1 and text.count("x") == 1
+
+
+def test_multi_column_table_nested_in_layout_table():
+    html = (
+        "<table><tr><td>导航</td></tr>"
+        "<tr><td><table><tr><th>项目</th><th>数值</th></tr><tr><td>GDP</td><td>5.2%</td></tr></table></td></tr>"
+        "<tr><td>页脚</td></tr></table>"
+    )
+    text = ss._md_table(_tables(html)[0])
+    assert text == "导航\n\n| 项目 | 数值 |\n| --- | --- |\n| GDP | 5.2% |\n\n页脚"